@@ -1,4 +1,5 @@
 """SMS and guest management API endpoints."""
+import asyncio
 import io
 import csv
 import logging
@@ -157,11 +158,12 @@ async def get_eligible_recipients(
     recipient_type: str,
     recipient_filter: Optional[dict]
 ) -> List[Guest]:
-    """Get list of guests eligible for SMS (consented, not opted out)."""
+    """Get list of guests eligible for SMS (consented, not opted out, valid number)."""
     query = select(Guest).where(
         Guest.wedding_id == wedding_id,
         Guest.sms_consent == True,
-        Guest.opted_out == False
+        Guest.opted_out == False,
+        Guest.phone_valid == True
     )
 
     if recipient_type == "group" and recipient_filter and "group" in recipient_filter:
@@ -667,6 +669,9 @@ async def send_sms_blast(
         )
         db.add(log)
 
+        if result.get("status") == "deduplicated":
+            # Same text already went to this number; not sent again, not failed
+            continue
         if result.get("success"):
             sent += 1
         else:
@@ -776,6 +781,41 @@ async def cancel_scheduled_message(
     if scheduled.status in ("sent", "partially_sent"):
         raise HTTPException(status_code=400, detail="Cannot cancel already sent message")
 
+    # Twilio has delivered it even if process_fixed_schedules hasn't marked it sent yet
+    if scheduled.status == "sent_to_twilio" and scheduled.scheduled_at <= datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Cannot cancel already sent message")
+
+    # Cancel the per-guest messages waiting in Twilio's scheduler (a scheduled
+    # message can have some left over from a failed hand-off)
+    if scheduled.status in ("sent_to_twilio", "scheduled"):
+        result = await db.execute(
+            select(MessageLog).where(
+                MessageLog.scheduled_message_id == scheduled.id,
+                MessageLog.status == "scheduled"
+            )
+        )
+        logs = result.scalars().all()
+        cancels = await asyncio.gather(*(
+            twilio_service.cancel_scheduled(log.twilio_sid) for log in logs
+        ))
+
+        failed = 0
+        for log, cancel in zip(logs, cancels):
+            if cancel.get("success"):
+                log.status = "canceled"
+            else:
+                failed += 1
+                logger.warning(f"Failed to cancel Twilio message {log.twilio_sid}: {cancel.get('error_message')}")
+
+        if failed:
+            # Keep what was cancelled; the rest will still be delivered, so the
+            # message keeps its status and a retry picks up the remainder
+            await db.commit()
+            raise HTTPException(
+                status_code=502,
+                detail=f"Could not cancel {failed} of {len(logs)} messages with Twilio. Please try again."
+            )
+
     scheduled.status = "cancelled"
     await db.commit()
     return {"message": "Scheduled message cancelled"}
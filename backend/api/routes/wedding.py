@@ -140,7 +140,7 @@ async def create_my_wedding(
     # Check if user already has a wedding
     if current_user.wedding_id:
         raise HTTPException(
-            status_code=400,
+            status_code=409,
             detail="You already have a wedding. Use PATCH to update it."
         )
 
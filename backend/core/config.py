@@ -4,7 +4,7 @@ import secrets
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import Optional
+from typing import List, Optional
 
 # Get the backend directory (where this config.py lives is in core/, so go up one level)
 BACKEND_DIR = Path(__file__).resolve().parent.parent
@@ -52,6 +52,9 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None
     TWILIO_MESSAGING_SERVICE_SID: Optional[str] = None  # For A2P 10DLC compliance
+    # From-numbers to rotate through when no messaging service is set (JSON list);
+    # each number is limited to a few messages per second
+    TWILIO_PHONE_NUMBER_POOL: List[str] = []
 
     # Email (Resend)
     RESEND_API_KEY: Optional[str] = None
@@ -16,11 +16,27 @@ def get_database_url() -> str:
     return url
 
 
+def get_pool_options(url: str) -> dict:
+    """Connection pool settings for the engine."""
+    # SQLite already gets a pooled connection per file (or a static one for
+    # :memory:), and rejects queue pool sizing arguments
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": 1800,  # Drop connections before the server idles them out
+        "pool_pre_ping": True,
+    }
+
+
 # Create async engine
+database_url = get_database_url()
 engine = create_async_engine(
-    get_database_url(),
+    database_url,
     echo=settings.DEBUG,
     future=True,
+    **get_pool_options(database_url),
 )
 
 # Session factory
@@ -159,6 +175,34 @@ async def run_migrations():
             END IF;
         END $$;
         """,
+        # Add phone_valid column so SMS jobs can skip unusable numbers
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'guests' AND column_name = 'phone_valid'
+            ) THEN
+                ALTER TABLE guests ADD COLUMN phone_valid BOOLEAN DEFAULT true;
+            END IF;
+        END $$;
+        """,
+        # Partial indexes for the SMS scheduler and retry jobs
+        """
+        CREATE INDEX IF NOT EXISTS ix_sched_due
+        ON scheduled_messages (schedule_type, scheduled_at)
+        WHERE status = 'scheduled';
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_msglog_retry
+        ON message_logs (retry_count)
+        WHERE status = 'failed';
+        """,
+        # Guest chat looks weddings up by access code
+        """
+        CREATE INDEX IF NOT EXISTS ix_weddings_access_code
+        ON weddings (access_code);
+        """,
     ]
 
     async with engine.begin() as conn:
@@ -1,4 +1,6 @@
 """The Wedding Concierge - FastAPI Application."""
+import asyncio
+import contextlib
 import logging
 import sys
 
@@ -419,6 +421,11 @@ async def startup():
     except Exception as e:
         logger.error(f"Failed to initialize scheduler: {e}")
 
+    # Pre-warm the shared scraping browser in the background so the first
+    # scrape request doesn't pay Chromium's cold start
+    from services.scraper.browser_fetch import get_shared_browser
+    app.state.browser_warmup = asyncio.create_task(get_shared_browser().warmup())
+
 
 @app.on_event("shutdown")
 async def shutdown():
@@ -428,6 +435,20 @@ async def shutdown():
         app.state.scheduler.shutdown(wait=False)
         logger.info("SMS scheduler shut down")
 
+    # Stop a warmup still launching Chromium, then close the shared scraping browser
+    warmup = getattr(app.state, 'browser_warmup', None)
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await warmup
+
+    from services.scraper.browser_fetch import close_shared_browser
+    await close_shared_browser()
+
+    # Close pooled Twilio connections
+    from services.sms.twilio_service import twilio_service
+    await twilio_service.close()
+
 
 if __name__ == "__main__":
     import uvicorn
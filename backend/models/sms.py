@@ -2,8 +2,9 @@
 import uuid
 from datetime import datetime, date
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Text, Date, DateTime, Boolean, ForeignKey, JSON, Integer
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Text, Date, DateTime, Boolean, ForeignKey, JSON, Integer, Index, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+import phonenumbers
 
 from core.database import Base
 
@@ -28,6 +29,7 @@ class Guest(Base):
     # Contact info
     name: Mapped[str] = mapped_column(String(200))
     phone_number: Mapped[str] = mapped_column(String(20))  # E.164 format: +1XXXXXXXXXX
+    phone_valid: Mapped[bool] = mapped_column(Boolean, default=True)  # Set by normalize_phone_number
     email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     # Grouping
@@ -57,6 +59,25 @@ class Guest(Base):
         "MessageLog", back_populates="guest", cascade="all, delete-orphan"
     )
 
+    @validates("phone_number")
+    def normalize_phone_number(self, key: str, phone: str) -> str:
+        """
+        Store phone numbers in E.164 form and record whether they are valid.
+
+        Parsing once on write keeps phonenumbers out of the SMS send path;
+        numbers that can't be parsed are kept as given with phone_valid False.
+        """
+        try:
+            parsed = phonenumbers.parse(phone, "US")
+        except phonenumbers.NumberParseException:
+            self.phone_valid = False
+            return phone
+
+        self.phone_valid = phonenumbers.is_valid_number(parsed)
+        if not self.phone_valid:
+            return phone
+        return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
     def __repr__(self):
         return f"<Guest {self.name} ({self.phone_number})>"
 
@@ -94,6 +115,13 @@ class SMSTemplate(Base):
 class ScheduledMessage(Base):
     """Scheduled or queued SMS campaigns."""
     __tablename__ = "scheduled_messages"
+    __table_args__ = (
+        # Partial index for the scheduler's "due messages" query
+        Index(
+            "ix_sched_due", "schedule_type", "scheduled_at",
+            postgresql_where=text("status = 'scheduled'"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
     wedding_id: Mapped[str] = mapped_column(
@@ -122,7 +150,7 @@ class ScheduledMessage(Base):
 
     # Status tracking
     status: Mapped[str] = mapped_column(String(20), default="draft")
-    # draft, scheduled, sending, sent, partially_sent, failed, cancelled
+    # draft, scheduled, sent_to_twilio, sending, sent, partially_sent, failed, cancelled
     sent_count: Mapped[int] = mapped_column(Integer, default=0)
     failed_count: Mapped[int] = mapped_column(Integer, default=0)
     total_recipients: Mapped[int] = mapped_column(Integer, default=0)
@@ -148,6 +176,13 @@ class ScheduledMessage(Base):
 class MessageLog(Base):
     """Individual SMS send history for tracking and debugging."""
     __tablename__ = "message_logs"
+    __table_args__ = (
+        # Partial index for the retry job's "failed, not exhausted" query
+        Index(
+            "ix_msglog_retry", "retry_count",
+            postgresql_where=text("status = 'failed'"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=generate_uuid)
     wedding_id: Mapped[str] = mapped_column(
@@ -167,7 +202,7 @@ class MessageLog(Base):
     # Twilio tracking
     twilio_sid: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="queued")
-    # queued, sent, delivered, undelivered, failed
+    # queued, scheduled, sent, delivered, undelivered, failed, canceled, deduplicated
     error_code: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
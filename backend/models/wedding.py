@@ -107,7 +107,7 @@ class Wedding(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     # Access control
-    access_code: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    access_code: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
 
     # Public registration slug (e.g., "smith-jones" for /join/smith-jones)
     slug: Mapped[Optional[str]] = mapped_column(String(100), unique=True, nullable=True, index=True)
@@ -4,118 +4,15 @@ from typing import Optional
 from datetime import datetime
 
 import resend
+from jinja2 import Environment
 
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
-
-class EmailService:
-    """Service for sending emails via Resend."""
-
-    def __init__(self):
-        self._configured = False
-
-    def _ensure_configured(self):
-        """Configure Resend API key."""
-        if not self._configured and settings.RESEND_API_KEY:
-            resend.api_key = settings.RESEND_API_KEY
-            self._configured = True
-
-    @property
-    def is_configured(self) -> bool:
-        """Check if Resend is properly configured."""
-        return bool(settings.RESEND_API_KEY)
-
-    async def send_email(
-        self,
-        to_email: str,
-        subject: str,
-        html_content: str,
-    ) -> dict:
-        """
-        Send an email via Resend.
-
-        Args:
-            to_email: Recipient email address
-            subject: Email subject line
-            html_content: HTML body of the email
-
-        Returns:
-            Dict with success status and details
-        """
-        if not self.is_configured:
-            logger.warning("Resend not configured - email not sent")
-            return {"success": False, "error": "Email service not configured"}
-
-        try:
-            self._ensure_configured()
-
-            params = {
-                "from": settings.EMAIL_FROM,
-                "to": [to_email],
-                "subject": subject,
-                "html": html_content,
-            }
-
-            response = resend.Emails.send(params)
-
-            return {
-                "success": True,
-                "id": response.get("id"),
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
-            return {"success": False, "error": str(e)}
-
-    def generate_weekly_digest_html(
-        self,
-        partner1_name: str,
-        partner2_name: str,
-        total_conversations: int,
-        total_messages: int,
-        unique_guests: int,
-        top_topics: list[tuple[str, int]],
-        week_start: datetime,
-        week_end: datetime,
-        dashboard_url: str,
-        guests_who_used_chat: int = 0,
-        total_guests: int = 0
-    ) -> str:
-        """
-        Generate HTML content for weekly digest email.
-
-        Args:
-            partner1_name: First partner's name
-            partner2_name: Second partner's name
-            total_conversations: Number of chat sessions this week
-            total_messages: Number of messages this week
-            unique_guests: Number of unique guests who chatted
-            top_topics: List of (topic, count) tuples
-            week_start: Start of the week
-            week_end: End of the week
-            dashboard_url: URL to the dashboard
-            guests_who_used_chat: Total guests who have used chat (all-time)
-            total_guests: Total guests in guest list
-
-        Returns:
-            HTML string for the email body
-        """
-        # Format dates
-        week_str = f"{week_start.strftime('%B %d')} - {week_end.strftime('%B %d, %Y')}"
-
-        # Build topics list
-        topics_html = ""
-        if top_topics:
-            topics_html = "<ul style='margin: 0; padding-left: 20px;'>"
-            for topic, count in top_topics[:5]:
-                topics_html += f"<li style='margin-bottom: 5px;'>{topic}: <strong>{count}</strong> questions</li>"
-            topics_html += "</ul>"
-        else:
-            topics_html = "<p style='color: #666;'>No conversations this week</p>"
-
-        return f"""
+# Weekly digest template, compiled once at import (autoescaped since it
+# renders user-provided names and guest topics)
+_DIGEST_TEMPLATE_SRC = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -134,7 +31,7 @@ class EmailService:
                                 The Wedding Concierge
                             </h1>
                             <p style="margin: 10px 0 0; color: #666; font-size: 14px;">
-                                Weekly Update for {partner1_name} & {partner2_name}
+                                Weekly Update for {{ partner1_name }} & {{ partner2_name }}
                             </p>
                         </td>
                     </tr>
@@ -146,24 +43,24 @@ class EmailService:
                                 Your Week in Numbers
                             </h2>
                             <p style="margin: 0 0 20px; color: #666; font-size: 14px;">
-                                {week_str}
+                                {{ week_str }}
                             </p>
 
                             <!-- Stats Grid -->
                             <table width="100%" cellpadding="0" cellspacing="0">
                                 <tr>
                                     <td width="33%" style="text-align: center; padding: 20px 10px; background-color: #fdf2f8; border-radius: 8px;">
-                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{total_conversations}</div>
+                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{{ total_conversations }}</div>
                                         <div style="font-size: 12px; color: #666; margin-top: 5px;">Conversations</div>
                                     </td>
                                     <td width="10"></td>
                                     <td width="33%" style="text-align: center; padding: 20px 10px; background-color: #fdf2f8; border-radius: 8px;">
-                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{total_messages}</div>
+                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{{ total_messages }}</div>
                                         <div style="font-size: 12px; color: #666; margin-top: 5px;">Messages</div>
                                     </td>
                                     <td width="10"></td>
                                     <td width="33%" style="text-align: center; padding: 20px 10px; background-color: #fdf2f8; border-radius: 8px;">
-                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{unique_guests}</div>
+                                        <div style="font-size: 32px; font-weight: bold; color: #be185d;">{{ unique_guests }}</div>
                                         <div style="font-size: 12px; color: #666; margin-top: 5px;">Guests</div>
                                     </td>
                                 </tr>
@@ -181,7 +78,7 @@ class EmailService:
                                             Guest Chat Engagement
                                         </h3>
                                         <p style="margin: 0; color: #15803d; font-size: 28px; font-weight: bold;">
-                                            {guests_who_used_chat} of {total_guests}
+                                            {{ guests_who_used_chat }} of {{ total_guests }}
                                         </p>
                                         <p style="margin: 5px 0 0; color: #666; font-size: 13px;">
                                             guests have used the concierge chat
@@ -198,14 +95,22 @@ class EmailService:
                             <h2 style="margin: 0 0 15px; color: #333; font-size: 18px; font-weight: 600;">
                                 What Guests Asked About
                             </h2>
-                            {topics_html}
+                            {% if top_topics %}
+                            <ul style='margin: 0; padding-left: 20px;'>
+                            {%- for topic, count in top_topics[:5] %}
+                                <li style='margin-bottom: 5px;'>{{ topic }}: <strong>{{ count }}</strong> questions</li>
+                            {%- endfor %}
+                            </ul>
+                            {% else %}
+                            <p style='color: #666;'>No conversations this week</p>
+                            {% endif %}
                         </td>
                     </tr>
 
                     <!-- CTA Button -->
                     <tr>
                         <td style="padding: 0 40px 40px; text-align: center;">
-                            <a href="{dashboard_url}" style="display: inline-block; padding: 14px 32px; background-color: #be185d; color: white; text-decoration: none; border-radius: 8px; font-weight: 600; font-size: 14px;">
+                            <a href="{{ dashboard_url }}" style="display: inline-block; padding: 14px 32px; background-color: #be185d; color: white; text-decoration: none; border-radius: 8px; font-weight: 600; font-size: 14px;">
                                 View Full Analytics
                             </a>
                         </td>
@@ -230,6 +135,113 @@ class EmailService:
 </html>
 """
 
+_jinja_env = Environment(autoescape=True)
+_DIGEST_TEMPLATE = _jinja_env.from_string(_DIGEST_TEMPLATE_SRC)
+
+
+class EmailService:
+    """Service for sending emails via Resend."""
+
+    def __init__(self):
+        # Snapshot settings once; they don't change after startup
+        self._from = settings.EMAIL_FROM
+        self._api_key = settings.RESEND_API_KEY
+        self._configured = bool(self._api_key)
+        if self._configured:
+            resend.api_key = self._api_key
+
+    @property
+    def is_configured(self) -> bool:
+        """Check if Resend is properly configured."""
+        return self._configured
+
+    async def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+    ) -> dict:
+        """
+        Send an email via Resend.
+
+        Args:
+            to_email: Recipient email address
+            subject: Email subject line
+            html_content: HTML body of the email
+
+        Returns:
+            Dict with success status and details
+        """
+        if not self._configured:
+            logger.warning("Resend not configured - email not sent")
+            return {"success": False, "error": "Email service not configured"}
+
+        try:
+            params = {
+                "from": self._from,
+                "to": [to_email],
+                "subject": subject,
+                "html": html_content,
+            }
+
+            response = resend.Emails.send(params)
+
+            return {
+                "success": True,
+                "id": response.get("id"),
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to send email to {to_email}: {e}")
+            return {"success": False, "error": str(e)}
+
+    def generate_weekly_digest_html(
+        self,
+        partner1_name: str,
+        partner2_name: str,
+        total_conversations: int,
+        total_messages: int,
+        unique_guests: int,
+        top_topics: list[tuple[str, int]],
+        week_start: datetime,
+        week_end: datetime,
+        dashboard_url: str,
+        guests_who_used_chat: int = 0,
+        total_guests: int = 0
+    ) -> str:
+        """
+        Generate HTML content for weekly digest email.
+
+        Args:
+            partner1_name: First partner's name
+            partner2_name: Second partner's name
+            total_conversations: Number of chat sessions this week
+            total_messages: Number of messages this week
+            unique_guests: Number of unique guests who chatted
+            top_topics: List of (topic, count) tuples
+            week_start: Start of the week
+            week_end: End of the week
+            dashboard_url: URL to the dashboard
+            guests_who_used_chat: Total guests who have used chat (all-time)
+            total_guests: Total guests in guest list
+
+        Returns:
+            HTML string for the email body
+        """
+        week_str = f"{week_start.strftime('%B %d')} - {week_end.strftime('%B %d, %Y')}"
+        return _DIGEST_TEMPLATE.render(
+            partner1_name=partner1_name,
+            partner2_name=partner2_name,
+            week_str=week_str,
+            total_conversations=total_conversations,
+            total_messages=total_messages,
+            unique_guests=unique_guests,
+            guests_who_used_chat=guests_who_used_chat,
+            total_guests=total_guests,
+            top_topics=top_topics,
+            dashboard_url=dashboard_url,
+        )
+
 
 # Singleton instance
 email_service = EmailService()
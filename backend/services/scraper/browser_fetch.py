@@ -1,26 +1,181 @@
 """Playwright-based browser fetching with stealth anti-detection."""
 import asyncio
+import os
 import random
+import re
 import logging
-from typing import Optional
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from playwright.async_api import async_playwright, BrowserContext, Page
 from playwright_stealth import Stealth
 
 logger = logging.getLogger(__name__)
 
+# On-disk Chromium profile so HTTP cache, cookies and service workers
+# survive browser restarts. Chromium locks it, so a browser that finds it
+# in use (another worker, script or StealthBrowser) runs on a temporary one.
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "wc_pw_profile")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Viewport randomized once per process for anti-detection; every start and
+# context rotation reuses it
+_VIEWPORT = (random.randint(1200, 1920), random.randint(800, 1080))
+
+# Address-like matches (state abbreviation + ZIP) used to sniff rendered content
+_ADDRESS_RE = re.compile(r"[A-Z]{2},?\s*\d{5}")
+
+# Travel/accommodation pages need extra waiting for hotel lists
+_TRAVEL_RE = re.compile(r"/(travel|accommodations|hotels)", re.IGNORECASE)
+
+# Markers that mean the static HTML is a JS/bot gate rather than real content
+_JS_REQUIRED_MARKERS = (
+    "__next_data__",
+    "please enable javascript",
+    "enable javascript and cookies",
+    "checking your browser",
+    "just a moment...",
+    "access denied",
+    "cf-chl",  # Cloudflare challenge
+)
+
+# Requests the scraper never needs: we only read the rendered HTML/text.
+# Blocked by URL pattern through CDP rather than page.route(), which would
+# turn off Chromium's HTTP cache for every request it intercepts.
+_BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",  # images
+    "mp4", "webm", "mp3", "m4a",  # media
+    "woff", "woff2", "ttf", "otf", "eot",  # fonts
+)
+_BLOCKED_TRACKERS = (
+    "google-analytics",
+    "googletagmanager",
+    "facebook.net",
+    "hotjar",
+    "doubleclick",
+)
+_BLOCKED_URL_PATTERNS = [
+    *(f"*.{ext}" for ext in _BLOCKED_EXTENSIONS),
+    *(f"*.{ext}?*" for ext in _BLOCKED_EXTENSIONS),
+    *(f"*{tracker}*" for tracker in _BLOCKED_TRACKERS),
+]
+
+# Additional anti-detection JavaScript (belt and suspenders), installed
+# once per context so every page inherits it
+_STEALTH_JS = """
+    // Mask webdriver property
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+
+    // Add fake plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [
+            {name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer'},
+            {name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai'},
+            {name: 'Native Client', filename: 'internal-nacl-plugin'}
+        ]
+    });
+
+    // Set realistic languages
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['en-US', 'en']
+    });
+
+    // Hide automation indicators
+    window.chrome = { runtime: {} };
+"""
+
+# Shared HTTP client for the static fast path
+_static_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_static_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client."""
+    global _static_client
+    if _static_client is None:
+        _static_client = httpx.AsyncClient(
+            http2=True,
+            timeout=15.0,
+            follow_redirects=True,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            },
+        )
+    return _static_client
+
+
+async def _try_static(url: str) -> Optional[str]:
+    """
+    Try to fetch a page with a plain HTTP GET.
+
+    Returns the HTML only when it already looks fully rendered; returns None
+    when the page needs JavaScript (or the request failed) so the caller can
+    escalate to the browser.
+    """
+    try:
+        response = await _get_static_client().get(url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.info(f"Static fetch failed for {url}: {e}")
+        return None
+
+    html = response.text
+    if len(html) <= 5000:
+        return None
+
+    html_lower = html.lower()
+    if any(marker in html_lower for marker in _JS_REQUIRED_MARKERS):
+        return None
+    if len(_ADDRESS_RE.findall(html)) < 2:
+        return None
+
+    logger.info(f"Static fetch successful: {len(html)} chars")
+    return html
+
 
 class PlaywrightNotAvailableError(Exception):
     """Raised when Playwright browsers are not installed."""
     pass
 
 
+def _is_missing_browser(error: Exception) -> bool:
+    """Whether a launch error means Chromium isn't installed."""
+    error_msg = str(error)
+    return "Executable doesn't exist" in error_msg or "playwright install" in error_msg.lower()
+
+
 class StealthBrowser:
     """Playwright browser with anti-detection stealth techniques."""
 
-    def __init__(self):
+    # Max idle pages kept open per origin for reuse
+    MAX_PAGES_PER_ORIGIN = 4
+
+    # Retire every open page after this many fetches to bound renderer and
+    # Playwright memory growth in long sessions. Only pages are replaced;
+    # the browser itself keeps running.
+    ROTATE_EVERY = 50
+
+    def __init__(self, user_data_dir: str = PROFILE_DIR):
         self._playwright = None
-        self._browser: Optional[Browser] = None
+        self._user_data_dir = user_data_dir
+        self._temp_profile: Optional[str] = None
         self._context: Optional[BrowserContext] = None
+        self._page_pool: Dict[str, List[Page]] = {}
+        self._pool_locks: Dict[str, asyncio.Lock] = {}
+        self._start_lock = asyncio.Lock()
+        self._viewport = {"width": _VIEWPORT[0], "height": _VIEWPORT[1]}
+        self._pages_served = 0
+        # Bumped on each rotation; pages opened in an older generation are
+        # closed instead of returned to the pool
+        self._generation = 0
+        self._page_generation: Dict[Page, int] = {}
         self._stealth = Stealth(
             navigator_webdriver=True,
             navigator_plugins=True,
@@ -38,117 +193,212 @@ class StealthBrowser:
         await self.close()
 
     async def start(self):
-        """Start the browser with stealth configuration."""
-        if self._browser is not None:
-            return
+        """Start the browser with stealth configuration (no-op if running)."""
+        async with self._start_lock:
+            if self._context is not None:
+                return
+            await self._launch()
+
+    async def warmup(self):
+        """Start the browser ahead of the first fetch to hide cold-start latency."""
+        try:
+            await self.start()
+        except PlaywrightNotAvailableError:
+            pass
+        except Exception as e:
+            logger.warning(f"Browser warmup failed: {e}")
 
+    async def _launch(self):
+        """Launch Chromium and create the stealth context."""
         logger.info("Starting stealth browser...")
 
         try:
             self._playwright = await async_playwright().start()
 
-            # Randomize viewport for anti-detection
-            viewport_width = random.randint(1200, 1920)
-            viewport_height = random.randint(800, 1080)
-
-            self._browser = await self._playwright.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-infobars",
-                    "--window-position=0,0",
-                    f"--window-size={viewport_width},{viewport_height}",
-                ]
-            )
-
-            self._context = await self._browser.new_context(
-                viewport={"width": viewport_width, "height": viewport_height},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                locale="en-US",
-                timezone_id="America/New_York",
-                java_script_enabled=True,
-                ignore_https_errors=True,
-            )
+            await self._open_context()
 
-            # Apply stealth to the context
-            await self._stealth.apply_stealth_async(self._context)
-
-            logger.info(f"Stealth browser started with viewport {viewport_width}x{viewport_height}")
+            logger.info(f"Stealth browser started with viewport {self._viewport['width']}x{self._viewport['height']}")
 
         except Exception as e:
-            error_msg = str(e)
-            if "Executable doesn't exist" in error_msg or "playwright install" in error_msg.lower():
+            if _is_missing_browser(e):
                 logger.warning("Playwright browser not installed - browser-based scraping disabled")
-                self._browser = None
+                self._context = None
                 self._playwright = None
                 raise PlaywrightNotAvailableError("Browser not available on this server")
             raise
 
+    async def _open_context(self):
+        """Launch the persistent stealth context using the stored viewport."""
+        profile = self._temp_profile or self._user_data_dir
+        try:
+            self._context = await self._launch_context(profile)
+        except Exception as e:
+            if self._temp_profile or _is_missing_browser(e):
+                raise
+            # Most likely the profile is locked by another Chromium
+            logger.warning(f"Could not use browser profile {profile} ({e}); using a temporary profile")
+            self._temp_profile = tempfile.mkdtemp(prefix="wc_pw_profile_")
+            self._context = await self._launch_context(self._temp_profile)
+
+        # Apply stealth to the context
+        await self._stealth.apply_stealth_async(self._context)
+        await self._context.add_init_script(_STEALTH_JS)
+
+    async def _launch_context(self, user_data_dir: str) -> BrowserContext:
+        """Launch Chromium with a persistent context on user_data_dir."""
+        width, height = self._viewport["width"], self._viewport["height"]
+
+        # Persistent context keeps the disk cache between runs
+        return await self._playwright.chromium.launch_persistent_context(
+            user_data_dir=user_data_dir,
+            headless=True,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                "--disable-dev-shm-usage",
+                "--no-sandbox",
+                "--disable-setuid-sandbox",
+                "--disable-infobars",
+                "--window-position=0,0",
+                f"--window-size={width},{height}",
+                "--no-first-run",
+                "--no-default-browser-check",
+            ],
+            viewport={"width": width, "height": height},
+            user_agent=USER_AGENT,
+            locale="en-US",
+            timezone_id="America/New_York",
+            java_script_enabled=True,
+            ignore_https_errors=True,
+        )
+
+    async def _close_page(self, page: Page):
+        """Close a page, ignoring errors from pages that are already gone."""
+        self._page_generation.pop(page, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _close_pooled_pages(self):
+        """Close every idle page in the pool."""
+        pool, self._page_pool = self._page_pool, {}
+        for pages in pool.values():
+            for page in pages:
+                await self._close_page(page)
+
+    async def _rotate_pages(self):
+        """
+        Start a new page generation and close the idle pages.
+
+        Pages still in use by in-flight fetches are closed when released,
+        so fetches never wait for a rotation.
+        """
+        logger.info(f"Recycling browser pages after {self._pages_served} fetches")
+        self._generation += 1
+        self._pages_served = 0
+        await self._close_pooled_pages()
+
     async def close(self):
-        """Close the browser and cleanup."""
-        if self._context:
-            await self._context.close()
-            self._context = None
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
-        if self._playwright:
-            await self._playwright.stop()
-            self._playwright = None
+        """Close the browser and cleanup (waits for a start in progress)."""
+        async with self._start_lock:
+            await self._close_pooled_pages()
+            self._pool_locks.clear()
+            self._page_generation.clear()
+            # Closing a persistent context shuts Chromium down but keeps the profile
+            if self._context:
+                await self._context.close()
+                self._context = None
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+            if self._temp_profile:
+                shutil.rmtree(self._temp_profile, ignore_errors=True)
+                self._temp_profile = None
         logger.info("Stealth browser closed")
 
-    async def fetch_page(self, url: str, wait_time: float = 3.0) -> Optional[str]:
+    def _pool_lock(self, origin: str) -> asyncio.Lock:
+        """Get the lock guarding the page pool for an origin."""
+        lock = self._pool_locks.get(origin)
+        if lock is None:
+            lock = self._pool_locks[origin] = asyncio.Lock()
+        return lock
+
+    async def _acquire_page(self, origin: str) -> Page:
+        """Reuse an idle page (this origin first), or open a new one."""
+        async with self._pool_lock(origin):
+            pages = self._page_pool.get(origin)
+            if pages:
+                return pages.pop()
+
+        # Borrow an idle page from another origin (pooled pages sit on about:blank)
+        for pages in self._page_pool.values():
+            if pages:
+                return pages.pop()
+
+        page = await self._context.new_page()
+        await self._block_assets(page)
+        self._page_generation[page] = self._generation
+        return page
+
+    async def _block_assets(self, page: Page):
+        """
+        Drop heavy assets and trackers on a new page.
+
+        Only URLs matching _BLOCKED_URL_PATTERNS are blocked, so XHR/fetch
+        requests (hotel lists loaded by travel pages) still go through and
+        everything else can be served from the HTTP cache.
+        """
+        cdp = await self._context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setBlockedURLs", {"urls": _BLOCKED_URL_PATTERNS})
+
+    async def _release_page(self, origin: str, page: Page, reusable: bool):
+        """Return a page to the pool after a successful fetch, else close it."""
+        if self._page_generation.get(page) != self._generation:
+            reusable = False
+        if reusable:
+            # Park idle pages on a blank document so site scripts stop running
+            try:
+                await page.goto("about:blank", timeout=5000)
+            except Exception:
+                reusable = False
+        async with self._pool_lock(origin):
+            pages = self._page_pool.setdefault(origin, [])
+            if reusable and len(pages) < self.MAX_PAGES_PER_ORIGIN:
+                pages.append(page)
+                return
+        await self._close_page(page)
+
+    async def fetch_page(self, url: str, wait_time: float = 1.0) -> Optional[str]:
         """
         Fetch a page using the stealth browser.
 
         Args:
             url: The URL to fetch
-            wait_time: Time to wait after page load for JS rendering
+            wait_time: Max seconds to wait for the network to settle after load
 
         Returns:
             HTML content or None if failed
         """
         if self._context is None:
             await self.start()
+        elif self._pages_served >= self.ROTATE_EVERY:
+            await self._rotate_pages()
 
+        origin = urlparse(url).netloc
+        is_travel = bool(_TRAVEL_RE.search(url))
         page: Optional[Page] = None
+        reusable = False
+        self._pages_served += 1
         try:
-            page = await self._context.new_page()
-
-            # Additional anti-detection JavaScript (belt and suspenders)
-            await page.add_init_script("""
-                // Mask webdriver property
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-
-                // Add fake plugins
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [
-                        {name: 'Chrome PDF Plugin', filename: 'internal-pdf-viewer'},
-                        {name: 'Chrome PDF Viewer', filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai'},
-                        {name: 'Native Client', filename: 'internal-nacl-plugin'}
-                    ]
-                });
-
-                // Set realistic languages
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en']
-                });
-
-                // Hide automation indicators
-                window.chrome = { runtime: {} };
-            """)
+            page = await self._acquire_page(origin)
 
             logger.info(f"Fetching with stealth browser: {url}")
 
-            # Navigate with timeout - use domcontentloaded since some sites have long-running requests
+            # Navigate with timeout - return as soon as the response commits
             response = await page.goto(
                 url,
-                wait_until="domcontentloaded",
+                wait_until="commit",
                 timeout=45000
             )
 
@@ -159,17 +409,26 @@ class StealthBrowser:
             status = response.status
             logger.info(f"Browser fetch status: {status}")
 
-            # Wait for dynamic content to load
-            await asyncio.sleep(wait_time)
+            # Bounded wait for the DOM - a slow DOMContentLoaded on heavy SPAs
+            # no longer fails the whole fetch, the waits below pick up from here
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=15000)
+            except Exception:
+                pass
+
+            # Wait for dynamic content to load - returns as soon as the network
+            # settles, with wait_time as the upper bound. Travel pages get a
+            # longer bound so React hydration of hotel lists can finish.
+            try:
+                idle_timeout = 10000 if is_travel else int(wait_time * 1000)
+                await page.wait_for_load_state("networkidle", timeout=idle_timeout)
+            except Exception:
+                pass
 
             # For travel pages, wait for all hotels to load
-            url_lower = url.lower()
-            if any(kw in url_lower for kw in ['/travel', '/accommodations', '/hotels']):
+            if is_travel:
                 logger.info("Travel page detected - waiting for all hotels to load")
                 try:
-                    # Wait for network to be mostly idle (React hydration complete)
-                    await page.wait_for_load_state("networkidle", timeout=10000)
-                    logger.info("Network idle, checking for hotels")
 
                     # Count addresses as proxy for hotel count (look for ZIP codes)
                     address_count = await page.evaluate("""
@@ -184,19 +443,32 @@ class StealthBrowser:
                     """)
                     logger.info(f"Found {address_count} addresses (hotels)")
 
-                    # If only 1 address found, wait a bit more and scroll
+                    # If only 1 address found, wait for hotel content to appear
                     if address_count < 2:
-                        logger.info("Less than 2 hotels, waiting longer...")
-                        await asyncio.sleep(2)
-
-                    # Progressive scroll to ensure all content loaded
-                    for scroll_pct in [50, 100]:
-                        await page.evaluate(f"window.scrollTo(0, document.body.scrollHeight * {scroll_pct / 100})")
-                        await asyncio.sleep(0.5)
-
-                    # Scroll back to top to capture everything
-                    await page.evaluate("window.scrollTo(0, 0)")
-                    await asyncio.sleep(0.3)
+                        logger.info("Less than 2 hotels, waiting for hotel content...")
+                        try:
+                            await page.wait_for_function(
+                                "!!document.querySelector('[class*=hotel],[class*=accommodation],address')"
+                                " || document.body.innerText.toLowerCase().includes('hotel')",
+                                timeout=3000,
+                            )
+                        except Exception:
+                            pass
+
+                    # Progressive scroll to trigger lazy-loaded content, then back
+                    # to top - one round-trip, pausing in-page for observers
+                    await page.evaluate("""
+                        async () => {
+                            const s = document.scrollingElement || document.body;
+                            const wait = ms => new Promise(r => setTimeout(r, ms));
+                            s.scrollTo(0, s.scrollHeight / 2);
+                            await wait(250);
+                            s.scrollTo(0, s.scrollHeight);
+                            await wait(400);
+                            s.scrollTo(0, 0);
+                            await wait(100);
+                        }
+                    """)
 
                     # Final check
                     final_address_count = await page.evaluate("""
@@ -214,7 +486,6 @@ class StealthBrowser:
                 # Quick scroll for non-travel pages
                 try:
                     await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await asyncio.sleep(0.3)
                 except Exception:
                     pass
 
@@ -222,6 +493,7 @@ class StealthBrowser:
             html = await page.content()
 
             logger.info(f"Browser fetch successful: {len(html)} chars")
+            reusable = True
             return html
 
         except Exception as e:
@@ -229,19 +501,65 @@ class StealthBrowser:
             return None
         finally:
             if page:
-                await page.close()
+                await self._release_page(origin, page, reusable)
+
+
+# Process-wide browser shared by scrapers (started lazily or via warmup)
+_shared_browser: Optional[StealthBrowser] = None
+
+# Bounds how many pages the shared browser renders at once
+_page_semaphore = asyncio.Semaphore(int(os.getenv("WC_BROWSER_CONCURRENCY", "4")))
+
+
+def get_shared_browser() -> StealthBrowser:
+    """Get or create the shared stealth browser."""
+    global _shared_browser
+    if _shared_browser is None:
+        _shared_browser = StealthBrowser()
+    return _shared_browser
+
+
+async def close_shared_browser():
+    """Close the shared stealth browser and static HTTP client if they were created."""
+    global _shared_browser, _static_client
+    if _shared_browser is not None:
+        await _shared_browser.close()
+        _shared_browser = None
+    if _static_client is not None:
+        await _static_client.aclose()
+        _static_client = None
+
+
+async def fetch_with_shared_browser(url: str, wait_time: float = 1.0) -> Optional[str]:
+    """
+    Fetch a URL with the shared stealth browser.
+
+    The browser is started on first use and reused by every caller; at most
+    WC_BROWSER_CONCURRENCY pages are open at once.
+
+    Raises:
+        PlaywrightNotAvailableError: If Chromium isn't installed
+    """
+    async with _page_semaphore:
+        browser = get_shared_browser()
+        await browser.start()
+        return await browser.fetch_page(url, wait_time=wait_time)
 
 
 # Convenience function for one-off fetches
 async def fetch_with_browser(url: str) -> Optional[str]:
     """
-    Fetch a single URL using a stealth browser.
+    Fetch a single URL, using a stealth browser only when needed.
 
-    This creates a new browser instance, fetches the page, and closes.
-    For multiple fetches, use StealthBrowser directly to reuse the browser.
+    A plain HTTP GET is tried first; if the static HTML already contains the
+    rendered content it is returned directly. Otherwise the page is rendered
+    by the shared browser, so repeated calls don't relaunch Chromium.
     """
-    async with StealthBrowser() as browser:
-        return await browser.fetch_page(url)
+    html = await _try_static(url)
+    if html:
+        return html
+
+    return await fetch_with_shared_browser(url)
 
 
 # Test function
@@ -250,7 +568,10 @@ async def _test():
     url = "https://www.theknot.com/us/hannah-nichols-and-parker-howell-nov-2017"
     print(f"Testing stealth browser with: {url}")
 
-    html = await fetch_with_browser(url)
+    try:
+        html = await fetch_with_browser(url)
+    finally:
+        await close_shared_browser()
     if html:
         print(f"Success! Got {len(html)} chars")
         print(f"First 500 chars: {html[:500]}")
@@ -265,4 +586,10 @@ async def _test():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    # Match the server's event loop (uvicorn runs on uvloop in production)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(_test())
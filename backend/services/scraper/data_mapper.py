@@ -1,28 +1,132 @@
 """Map scraped wedding website data to structured Wedding model format."""
 import re
-import json
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from anthropic import AsyncAnthropic
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 
 from core.config import settings
 
+try:
+    # Faster C parser for Claude's JSON replies; same Python types as json
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
-
-class WeddingDataMapper:
-    """Maps raw scraped data to structured wedding data using Claude for intelligent extraction."""
-
-    def __init__(self):
-        """Initialize the data mapper with Claude client."""
+# Suffixes stripped from couple-name text ("Jane & John's Wedding Website")
+_RE_SUFFIX_WEDDING_APOS = re.compile(r"'s Wedding.*$", re.IGNORECASE)
+_RE_SUFFIX_WEDDING = re.compile(r" Wedding.*$", re.IGNORECASE)
+_RE_SUFFIX_DASH = re.compile(r" - .*$")
+
+# Couple-name separator ("Jane & John", "Jane and John", "Jane + John")
+_COUPLE_SEP = re.compile(r"\s+(?:&|and|\+)\s+", re.IGNORECASE)
+
+# Field defaults for a mapped wedding record
+_EMPTY_RESULT: Dict[str, Any] = {
+    "partner1_name": "",
+    "partner2_name": "",
+    "wedding_date": None,
+    "wedding_time": None,
+    "dress_code": None,
+    "ceremony_venue_name": None,
+    "ceremony_venue_address": None,
+    "reception_venue_name": None,
+    "reception_venue_address": None,
+    "reception_time": None,
+    "registry_urls": None,
+    "rsvp_url": None,
+    "additional_notes": None,
+    "events": [],
+    "accommodations": [],
+    "faqs": [],
+}
+_NAME_FIELDS = ("partner1_name", "partner2_name")
+_LIST_FIELDS = ("events", "accommodations", "faqs")
+
+# Month number by 3-letter prefix (unique for every month name/abbreviation)
+_MONTH3 = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Date formats
+_RE_DATE_SLASH = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")  # MM/DD/YYYY or M/D/YYYY
+_RE_DATE_MDY = re.compile(r"([A-Za-z]+)\s+(\d{1,2}),?\s+(\d{4})")  # Month DD, YYYY
+_RE_DATE_DMY = re.compile(r"(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})")  # DD Month YYYY
+
+# Max characters of site text sent to Claude. The scrapers already pack
+# full_text by page priority under this (see scraper._join_capped).
+_MAX_PROMPT_CHARS = 35000
+
+# Shared Claude client - one connection pool for every mapper instance
+_claude_client: Optional[AsyncAnthropic] = None
+
+
+def _get_claude() -> AsyncAnthropic:
+    """Get or create the shared Claude client."""
+    global _claude_client
+    if _claude_client is None:
         api_key = settings.ANTHROPIC_API_KEY
         if not api_key:
             logger.error("ANTHROPIC_API_KEY not set in settings!")
         else:
             logger.info(f"Initializing Claude client with API key: {api_key[:20]}...")
-        self.client = AsyncAnthropic(api_key=api_key)
+        _claude_client = AsyncAnthropic(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=32),
+            ),
+        )
+    return _claude_client
+
+
+def _find_top_json(s: str) -> Optional[str]:
+    """
+    Return the first balanced top-level JSON object in a string.
+
+    Single pass over the text tracking brace depth, skipping braces that
+    appear inside string literals.
+    """
+    start = s.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+
+class WeddingDataMapper:
+    """Maps raw scraped data to structured wedding data using Claude for intelligent extraction."""
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        """Shared Claude client."""
+        return _get_claude()
 
     async def extract_structured_data(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -30,13 +134,25 @@ class WeddingDataMapper:
 
         Uses Claude to intelligently parse and structure the data.
         """
-        # First try to extract what we can directly
-        direct_extracted = self._extract_direct_fields(raw_data)
-
-        # Use Claude to extract additional structured data from full text
+        # Start the Claude request first so it is in flight during direct parsing
         full_text = raw_data.get("full_text", "")
+        llm_task = None
         if full_text:
-            llm_extracted = await self._extract_with_claude(full_text, raw_data)
+            llm_task = asyncio.create_task(self._extract_with_claude(full_text, raw_data))
+            # Yield once so the task runs up to its network wait; a new task
+            # doesn't start until the creating coroutine awaits
+            await asyncio.sleep(0)
+
+        # Extract what we can directly while Claude works
+        try:
+            direct_extracted = self._extract_direct_fields(raw_data)
+        except BaseException:
+            if llm_task:
+                llm_task.cancel()
+            raise
+
+        if llm_task:
+            llm_extracted = await llm_task
             # Merge, preferring direct extraction for basic fields
             return self._merge_data(direct_extracted, llm_extracted)
 
@@ -44,51 +160,33 @@ class WeddingDataMapper:
 
     def _extract_direct_fields(self, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract fields directly from structured scraped data."""
-        result = {
-            "partner1_name": "",
-            "partner2_name": "",
-            "wedding_date": None,
-            "wedding_time": None,
-            "dress_code": None,
-            "ceremony_venue_name": None,
-            "ceremony_venue_address": None,
-            "reception_venue_name": None,
-            "reception_venue_address": None,
-            "reception_time": None,
-            "registry_urls": None,
-            "rsvp_url": None,
-            "additional_notes": None,
-            "events": [],
-            "accommodations": [],
-            "faqs": []
-        }
+        computed: Dict[str, Any] = {}
 
         # Extract couple names from various sources
         couple_names = raw_data.get("couple_names", "") or raw_data.get("main_heading", "") or raw_data.get("page_title", "")
         if couple_names:
-            names = self._parse_couple_names(couple_names)
-            result["partner1_name"] = names[0]
-            result["partner2_name"] = names[1]
+            computed["partner1_name"], computed["partner2_name"] = self._parse_couple_names(couple_names)
 
         # Extract date
         date_text = raw_data.get("wedding_date_text", "") or raw_data.get("possible_date", "")
         if date_text:
-            result["wedding_date"] = self._parse_date(date_text)
+            computed["wedding_date"] = self._parse_date(date_text)
 
         # Extract RSVP URL
         if raw_data.get("rsvp_url"):
-            result["rsvp_url"] = raw_data["rsvp_url"]
+            computed["rsvp_url"] = raw_data["rsvp_url"]
 
         # Extract registry links
         registry_links = raw_data.get("registry_links", [])
         if registry_links:
-            result["registry_urls"] = {
+            computed["registry_urls"] = {
                 link.get("text", f"Registry {i+1}"): link.get("url", "")
                 for i, link in enumerate(registry_links)
                 if link.get("url")
             }
 
-        return result
+        # Fresh lists per result so callers can't mutate the shared defaults
+        return {**_EMPTY_RESULT, "events": [], "accommodations": [], "faqs": [], **computed}
 
     def _parse_couple_names(self, text: str) -> tuple:
         """Parse partner names from text like 'Jane & John' or 'Jane and John Smith'."""
@@ -96,20 +194,14 @@ class WeddingDataMapper:
         text = text.strip()
 
         # Remove common suffixes
-        text = re.sub(r"'s Wedding.*$", "", text, flags=re.IGNORECASE)
-        text = re.sub(r" Wedding.*$", "", text, flags=re.IGNORECASE)
-        text = re.sub(r" - .*$", "", text)
-
-        # Try to split by common separators
-        separators = [" & ", " and ", " AND ", " + "]
-        for sep in separators:
-            if sep.lower() in text.lower():
-                # Case-insensitive split
-                parts = re.split(re.escape(sep), text, flags=re.IGNORECASE)
-                if len(parts) >= 2:
-                    name1 = parts[0].strip()
-                    name2 = parts[1].strip()
-                    return (name1, name2)
+        text = _RE_SUFFIX_WEDDING_APOS.sub("", text)
+        text = _RE_SUFFIX_WEDDING.sub("", text)
+        text = _RE_SUFFIX_DASH.sub("", text)
+
+        # Split on the first common separator
+        parts = _COUPLE_SEP.split(text, maxsplit=1)
+        if len(parts) == 2:
+            return (parts[0].strip(), parts[1].strip())
 
         # Fallback: just return the whole text as partner1
         return (text, "")
@@ -119,56 +211,37 @@ class WeddingDataMapper:
         if not text:
             return None
 
-        # Common date patterns
-        patterns = [
-            r"(\d{1,2})/(\d{1,2})/(\d{4})",  # MM/DD/YYYY or M/D/YYYY
-            r"(\w+)\s+(\d{1,2}),?\s+(\d{4})",  # Month DD, YYYY
-            r"(\d{1,2})\s+(\w+)\s+(\d{4})",  # DD Month YYYY
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                try:
-                    groups = match.groups()
-                    if pattern == patterns[0]:
-                        # MM/DD/YYYY
-                        month, day, year = int(groups[0]), int(groups[1]), int(groups[2])
-                        return f"{year}-{month:02d}-{day:02d}"
-                    elif pattern == patterns[1]:
-                        # Month DD, YYYY
-                        month_name, day, year = groups[0], int(groups[1]), int(groups[2])
-                        month = self._month_to_number(month_name)
-                        if month:
-                            return f"{year}-{month:02d}-{day:02d}"
-                    elif pattern == patterns[2]:
-                        # DD Month YYYY
-                        day, month_name, year = int(groups[0]), groups[1], int(groups[2])
-                        month = self._month_to_number(month_name)
-                        if month:
-                            return f"{year}-{month:02d}-{day:02d}"
-                except (ValueError, IndexError):
-                    continue
+        match = _RE_DATE_SLASH.search(text)
+        if match:
+            month, day, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+            return f"{year}-{month:02d}-{day:02d}"
+
+        for pattern in (_RE_DATE_MDY, _RE_DATE_DMY):
+            match = pattern.search(text)
+            if not match:
+                continue
+            try:
+                if pattern is _RE_DATE_MDY:
+                    month_name, day, year = match.group(1), int(match.group(2)), int(match.group(3))
+                else:
+                    day, month_name, year = int(match.group(1)), match.group(2), int(match.group(3))
+                month = self._month_to_number(month_name)
+                if month:
+                    return f"{year}-{month:02d}-{day:02d}"
+            except ValueError:
+                continue
 
         return None
 
     def _month_to_number(self, month_name: str) -> Optional[int]:
         """Convert month name to number."""
-        months = {
-            "january": 1, "february": 2, "march": 3, "april": 4,
-            "may": 5, "june": 6, "july": 7, "august": 8,
-            "september": 9, "october": 10, "november": 11, "december": 12,
-            "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6,
-            "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
-        }
-        return months.get(month_name.lower().strip())
+        return _MONTH3.get(month_name.strip()[:3].lower())
 
     async def _extract_with_claude(self, full_text: str, raw_data: Dict[str, Any]) -> Dict[str, Any]:
         """Use Claude to intelligently extract structured wedding data."""
         # Truncate text if too long - allow more for multi-page scraping
-        max_chars = 35000
-        if len(full_text) > max_chars:
-            full_text = full_text[:max_chars] + "..."
+        if len(full_text) > _MAX_PROMPT_CHARS:
+            full_text = full_text[:_MAX_PROMPT_CHARS] + "..."
 
         # Diagnostic logging
         logger.info(f"Text to Claude: {len(full_text)} chars")
@@ -252,9 +325,9 @@ Website content:
             # Extract JSON from response
             response_text = response.content[0].text
             # Try to find JSON in the response
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                result = json.loads(json_match.group())
+            snippet = _find_top_json(response_text)
+            if snippet:
+                result = _loads(snippet)
                 # Diagnostic logging for extracted data
                 accommodations = result.get('accommodations', [])
                 logger.info(f"Claude extracted: {len(accommodations)} accommodations")
@@ -272,20 +345,14 @@ Website content:
 
     def _merge_data(self, direct: Dict[str, Any], llm: Dict[str, Any]) -> Dict[str, Any]:
         """Merge direct extraction with LLM extraction, preferring non-empty values."""
-        result = direct.copy()
-
-        for key, value in llm.items():
-            if value is not None:
-                # For simple fields, prefer LLM if direct is empty
-                if key in ["partner1_name", "partner2_name"]:
-                    if not result.get(key) and value:
-                        result[key] = value
-                # For lists, extend
-                elif key in ["events", "accommodations", "faqs"]:
-                    if isinstance(value, list) and value:
-                        result[key] = value
-                # For other fields, prefer LLM if we don't have it
-                elif not result.get(key):
-                    result[key] = value
-
-        return result
+        overrides = {
+            key: value
+            for key, value in llm.items()
+            if value is not None and (
+                # For lists, take the LLM's non-empty list
+                (isinstance(value, list) and bool(value)) if key in _LIST_FIELDS
+                # For other fields, prefer LLM if we don't have it (names must be non-empty)
+                else not direct.get(key) and (bool(value) or key not in _NAME_FIELDS)
+            )
+        }
+        return {**direct, **overrides}
@@ -1,20 +1,445 @@
 """Wedding website scraper for popular platforms."""
 import re
-import json
+import time
+import random
+import itertools
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Union
 from urllib.parse import urlparse, urljoin
-from datetime import datetime
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+import soupsieve
 
-from .browser_fetch import StealthBrowser, PlaywrightNotAvailableError
+try:
+    # Faster C parser for JSON blobs embedded in pages; same Python types as json
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+try:
+    # C-backed parser for plain subpages; BeautifulSoup handles everything without it
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+from .browser_fetch import PlaywrightNotAvailableError, fetch_with_shared_browser
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Page markup: httpx hands back raw bytes (the parsers sniff the charset),
+# the browser returns rendered text
+Html = Union[str, bytes]
+
+# Text that means we got a bot-protection page instead of the site
+_BLOCKED_INDICATORS = [
+    "Access Denied",
+    "Please enable JavaScript",
+    "Checking your browser",
+    "Just a moment...",
+    "Enable JavaScript and cookies",
+    "Reference&#32;&#35;",  # Akamai error reference
+]
+_BLOCKED_RE = re.compile("|".join(map(re.escape, _BLOCKED_INDICATORS)))
+_BLOCKED_BYTES_RE = re.compile(b"|".join(re.escape(i.encode()) for i in _BLOCKED_INDICATORS))
+
+# Transient HTTP statuses worth retrying, and the backoff ceiling (seconds)
+_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+_MAX_BACKOFF = 4.0
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After (capped) if given."""
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after.strip()), _MAX_BACKOFF)
+    return random.uniform(0, min(0.25 * 2 ** attempt, _MAX_BACKOFF))
+
+
+# Couple names in URL paths: /us/jane-and-john, /wedding/jane-john, etc.
+_COUPLE_URL_PATTERNS = [
+    re.compile(r"/us/([a-z]+)-and-([a-z]+)"),
+    re.compile(r"/wedding/([a-z]+)-([a-z]+)"),
+    re.compile(r"/([a-z]+)-and-([a-z]+)"),
+    re.compile(r"/([a-z]+)-([a-z]+)-wedding"),
+]
+
+# Line filters for _clean_page_text. The whole-line shapes (icon names, bare
+# numbers, prices) share one anchored pattern so each line takes one match.
+_JUNK_LINE_RE = re.compile(r'(?:[a-z_]{1,29}|[\d\s]+|\$[\d,]+\.?\d*)$')
+# Registry/shop-related content that pollutes travel pages (matched on lowercased lines)
+_REGISTRY_LINE_RE = re.compile("|".join(map(re.escape, [
+    'needs 1 of', 'shop registry', 'gift providers',
+    'our wish list', 'filter/sort', 'price low to high',
+    'price high to low', 'cash fund', 'honeymoon fund',
+    'gift any amount', 'purchased', 'add to cart',
+    'target™', 'threshold™', 'brightroom™', 'amazon.com',
+])))
+
+# Hotel section signals for travel pages. The keyword pattern is a lookahead
+# so findall reports every keyword occurrence, even overlapping ones
+# ("stay" inside "where to stay"); scoring counts the distinct keywords found.
+_TRAVEL_KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, [
+    'travel', 'hotel', 'accommod', 'stay', 'lodging', 'where to stay',
+    'room block', 'book your room', 'reserv', 'check-in', 'check-out',
+    'courtyard', 'marriott', 'hilton', 'hyatt', 'inn', 'suites',
+])) + "))")
+_REGISTRY_SECTION_RE = re.compile("needs 1 of|add to cart|shop registry|our wish list", re.IGNORECASE)
+_PHONE_RE = re.compile(r'\(\d{3}\)\s*\d{3}[-.]?\d{4}')
+_STREET_RE = re.compile(r'\d+\s+\w+\s+(st|street|ave|avenue|blvd|boulevard|rd|road|dr|drive|ln|lane)')
+
+# Platform scraper patterns
+_DATE_RE = re.compile(r"(\w+\s+\d{1,2},?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4})")
+_WRITTEN_DATE_RE = re.compile(r"(\w+\s+\d{1,2},?\s+\d{4})")
+_ADDRESS_CLASS_RE = re.compile(r"address|location|venue", re.I)
+_TITLE_POSSESSIVE_RE = re.compile(r"^([^']+)'s")
+_REGISTRY_STORES_RE = re.compile(
+    "amazon|target|crate|williams-sonoma|registry|bloomingdale|bed bath|pottery barn|macy|zola|honeyfund",
+    re.IGNORECASE,
+)
+
+# Parts of a Next.js __NEXT_DATA__ payload worth keeping; the rest is build
+# metadata and page chrome that nothing downstream reads
+_NEXT_DATA_KEEP_PATHS = [
+    ("props", "pageProps", "event"),
+    ("props", "pageProps", "eventInfo"),
+    ("props", "pageProps", "couple"),
+    ("props", "pageProps", "wedding"),
+]
+
+
+def _extract_paths(obj: Any, paths: List[tuple]) -> Dict[str, Any]:
+    """Pick the values at the given key paths, keyed by each path's last key."""
+    picked = {}
+    for path in paths:
+        value = obj
+        for key in path:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+        if value:
+            picked[path[-1]] = value
+    return picked
+
+
+# Preferred BeautifulSoup parser; drops to the stdlib parser if lxml is missing
+_HTML_PARSER = "lxml"
+
+
+# Subpage extraction only reads <body>; skipping <head> avoids building
+# nodes for the large inline scripts/styles SPAs put there
+_BODY_ONLY = SoupStrainer("body")
+
+
+def _make_soup(markup: Html, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse HTML with lxml, falling back to html.parser when lxml isn't installed."""
+    global _HTML_PARSER
+    try:
+        return BeautifulSoup(markup, _HTML_PARSER, parse_only=parse_only)
+    except FeatureNotFound:
+        logger.warning("lxml not installed - falling back to html.parser")
+        _HTML_PARSER = "html.parser"
+        return BeautifulSoup(markup, _HTML_PARSER, parse_only=parse_only)
+
+
+# Non-content elements stripped before extracting page text (registry
+# sidebars, footers, cookie banners, etc.)
+_NON_CONTENT_SELECTORS = [
+    '[data-testid*="registry"]',  # Registry widgets
+    '[class*="registry"]',
+    '[class*="Registry"]',
+    '[class*="sidebar"]',
+    '[class*="Sidebar"]',
+    '[class*="gift-list"]',
+    '[class*="GiftList"]',
+    '[class*="wishlist"]',
+    '[class*="WishList"]',
+    'aside',  # Sidebars
+    '[role="complementary"]',  # Accessibility sidebars
+    'footer',
+    '[class*="footer"]',
+    '[class*="Footer"]',
+    '[class*="cookie"]',
+    '[class*="Cookie"]',
+    '[class*="consent"]',
+    '[class*="Consent"]',
+    '[class*="modal"]',
+    '[class*="Modal"]',
+    '[class*="popup"]',
+    '[class*="Popup"]',
+]
+
+_NON_CONTENT_SEL = soupsieve.compile(", ".join(_NON_CONTENT_SELECTORS))
+
+# FAQ-like containers on Q&A pages
+_QA_TAGS = ('details', 'summary', 'dt', 'dd')
+_QA_CLASS_SELECTOR = (
+    '[class*="faq"], [class*="Faq"], [class*="question"], '
+    '[class*="Question"], [class*="answer"], [class*="Answer"]'
+)
+_QA_CLASS_SEL = soupsieve.compile(_QA_CLASS_SELECTOR)
+_QA_SEL = soupsieve.compile(", ".join(_QA_TAGS) + ", " + _QA_CLASS_SELECTOR)
+
+# Link targets that are never subpages (anchors, scripts, contact links)
+_SKIP_HREF_PREFIXES = ('#', 'javascript:', 'mailto:', 'tel:', 'sms:')
+_ABSOLUTE_PREFIXES = ('http://', 'https://')
+
+# Page names that get section-level extraction in _extract_main_content
+_TRAVEL_PAGE_NAMES = ['travel', 'accommodations', 'hotels']
+_QA_PAGE_NAMES = ['q-a', 'qa', 'faq']
+_TRAVEL_SECTION_TAGS = frozenset(['main', 'article', 'section', 'div'])
+
+# Subpages that need extra wait time for JS to render hotel/accommodation info
+_SLOW_RENDER_KEYWORDS = ["travel", "accommodations", "hotels", "stay", "lodging"]
+
+
+def _is_nav_element(tag) -> bool:
+    """Match <nav>/<header>, role="navigation", or a nav/menu/header class (any case)."""
+    if tag.name in ('nav', 'header') or tag.get('role') == 'navigation':
+        return True
+    classes = tag.get('class')
+    if not classes:
+        return False
+    class_str = ' '.join(classes).lower()
+    return 'nav' in class_str or 'menu' in class_str or 'header' in class_str
+
+
+# Section buckets per platform: field -> (keywords, max chars kept, chars of text searched)
+_SECTION_TAGS = ["section", "div", "article"]
+
+
+def _compile_buckets(buckets: Dict[str, tuple]) -> tuple:
+    """Compile a bucket table into one keyword scan.
+
+    Returns (pattern, hits, max_chars, window). The lookahead pattern
+    reports the longest keyword starting at each position; hits maps that
+    keyword to every (field, keyword length, chars searched) it implies,
+    including shorter keywords it starts with ("where to stay" -> "where").
+    """
+    keywords = sorted({kw for kws, _, _ in buckets.values() for kw in kws}, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+    hits = {
+        kw: [
+            (field, len(sub), prefix_chars)
+            for field, (kws, _, prefix_chars) in buckets.items()
+            for sub in kws if kw.startswith(sub)
+        ]
+        for kw in keywords
+    }
+    max_chars = {field: limit for field, (_, limit, _) in buckets.items()}
+    window = max(prefix_chars for _, _, prefix_chars in buckets.values())
+    return pattern, hits, max_chars, window
+
+
+_KNOT_SECTIONS = _compile_buckets({
+    "venue_info": (["venue", "location", "ceremony", "reception", "where", "place"], 2000, 200),
+    "travel_info": (["travel", "hotel", "accommod", "stay", "lodging", "where to stay"], 3000, 200),
+    "schedule_info": (["schedule", "event", "itinerary", "timeline", "weekend", "activities"], 3000, 200),
+    "faq_info": (["faq", "question", "q&a", "q & a"], 3000, 100),
+})
+_ZOLA_SECTIONS = _compile_buckets({
+    "travel_info": (["hotel", "accommodation", "stay"], 3000, 200),
+    "schedule_info": (["schedule", "event", "itinerary"], 3000, 200),
+    "registry_info": (["registry", "gift"], 2000, 200),
+})
+_JOY_SECTIONS = _compile_buckets({
+    "travel_info": (["hotel", "travel"], 3000, 200),
+    "schedule_info": (["schedule", "event"], 3000, 200),
+    "faq_info": (["faq", "question"], 3000, 200),
+})
+_GENERIC_SECTIONS = _compile_buckets({
+    "travel_info": (["hotel", "travel", "accommodation", "stay", "lodging"], 3000, 200),
+    "schedule_info": (["schedule", "event", "itinerary", "timeline"], 3000, 200),
+    "faq_info": (["faq", "question", "q&a"], 3000, 200),
+    "registry_info": (["registry", "gift"], 3000, 200),
+})
+
+
+def _text_prefix(el, limit: int, separator: str = "") -> str:
+    """First `limit` chars of el.get_text(separator, strip=True), walking only as far as needed.
+
+    Outer wrapper divs hold most of the page, so materializing their full
+    text just to read a keyword window is the expensive part of a section scan.
+    """
+    parts = []
+    size = -len(separator)
+    for string in el.stripped_strings:
+        parts.append(string)
+        size += len(separator) + len(string)
+        if size >= limit:
+            break
+    return separator.join(parts)[:limit]
+
+
+@lru_cache(maxsize=1)
+def _utc_iso(second: int) -> str:
+    """ISO-8601 UTC timestamp for a whole epoch second, formatted once per second."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+
+
+def _scraped_at() -> str:
+    """Timestamp for scrape results; second precision is all anything needs."""
+    return _utc_iso(int(time.time()))
+
+
+def _iter_tags(root, names: frozenset):
+    """Yield elements under root whose tag is in names, in document order.
+
+    Unlike find_all this is lazy, so callers that stop early skip the rest
+    of the tree.
+    """
+    for el in root.descendants:
+        if el.name in names:
+            yield el
+
+
+def _class_id(el) -> str:
+    """Lowercased class list and id of an element, for keyword checks."""
+    return (" ".join(el.get("class", [])) + " " + (el.get("id") or "")).lower()
+
+
+def _is_date_testid(value: Optional[str]) -> bool:
+    """data-testid filter: contains "date" in any case (a plain substring test, no regex)."""
+    return value is not None and "date" in value.lower()
+
+
+def _section_priority(part: str) -> int:
+    """Rank a full-text part by its "=== X PAGE ===" header (lower is kept first)."""
+    header = part.lstrip()
+    if not header.startswith("==="):
+        return 3
+    header = header[:header.find("===", 3)].lower()
+    if any(kw in header for kw in ("travel", "accommodation", "hotel", "stay")):
+        return 0
+    if "venue" in header:
+        return 1
+    if any(kw in header for kw in ("event", "schedule", "itinerary")):
+        return 2
+    return 3
+
+
+def _join_capped(parts, limit: int) -> str:
+    """Join full-text parts into at most limit characters, section by section.
+
+    The first part (main page text) is always kept, truncated if needed.
+    The rest are kept whole in priority order (travel, venue, events,
+    everything else) while they fit, and the leftover space goes to the
+    most important part that didn't. Kept parts are re-emitted in their
+    original order, so a long site never loses its travel page to a
+    blind cut.
+    """
+    parts = iter(parts)
+    first = next(parts, "")[:limit]
+    budget = limit - len(first)
+
+    kept = []
+    skipped = None
+    for _, order, part in sorted(
+        (_section_priority(part), order, part) for order, part in enumerate(parts)
+    ):
+        if len(part) <= budget:
+            kept.append((order, part))
+            budget -= len(part)
+        elif skipped is None:
+            skipped = (order, part)
+    if skipped and budget > 0:
+        kept.append((skipped[0], skipped[1][:budget]))
+
+    kept.sort()
+    return first + "".join(part for _, part in kept)
+
+
+def _response_html(response: httpx.Response) -> Html:
+    """Body of a fetched page, undecoded when that is safe.
+
+    lxml/lexbor read UTF-8 bytes (or a <meta charset>) themselves, but they
+    can't see the Content-Type header, so a page whose charset is only
+    declared there is decoded by httpx instead.
+    """
+    charset = response.charset_encoding
+    if charset is None or charset.lower().replace("_", "-") in ("utf-8", "utf8"):
+        return response.content
+    return response.text
+
+
+def _redirect_note(pages_available: List[Dict]) -> str:
+    """Full-text note listing pages (photos/registry) that weren't scraped.
+
+    This tells Claude to redirect users to view these on the couple's website.
+    """
+    if not pages_available:
+        return ""
+    lines = [
+        "\n\n=== PAGES TO REDIRECT GUESTS TO ===\n",
+        "The following pages are available on the couple's wedding website. ",
+        "Direct guests to visit these URLs to view this content:\n",
+    ]
+    lines.extend(f"- {page['name']}: {page['url']}\n" for page in pages_available)
+    return "".join(lines)
+
+
+_DATE_TAGS = frozenset(["p", "div", "span", "h2", "h3"])
+
+
+def _find_short_date(soup: BeautifulSoup, pattern: re.Pattern) -> Optional[str]:
+    """First date `pattern` finds in a heading, paragraph, div or span with under 100 chars of text.
+
+    Long elements are rejected after reading 100 chars, so wrapper divs
+    never have their whole text built just to be skipped.
+    """
+    for elem in _iter_tags(soup, _DATE_TAGS):
+        text = _text_prefix(elem, 100)
+        if len(text) < 100:  # Avoid grabbing from long paragraphs
+            match = pattern.search(text)
+            if match:
+                return match.group(1)
+    return None
+
+
+def _classify_sections(
+    soup: BeautifulSoup,
+    sections: tuple,
+    tags: List[str] = _SECTION_TAGS,
+    match_attrs: bool = False,
+) -> Dict[str, str]:
+    """Fill each bucket with the text of the first section matching its keywords.
+
+    One walk over the section elements serves every bucket, and one regex
+    scan per element finds every bucket it belongs to. With match_attrs the
+    keywords are also tested against the element's class and id.
+    """
+    pattern, hits, max_chars, window = sections
+    found: Dict[str, str] = {}
+    open_fields = set(max_chars)
+    # Lazy walk, so a page whose buckets fill early stops there
+    for section in _iter_tags(soup, frozenset(tags)):
+        matched = set()
+        if match_attrs:
+            for m in pattern.finditer(_class_id(section)):
+                matched.update(field for field, _, _ in hits[m.group(1)])
+        # Only read the text window if class/id left an open bucket unsettled
+        if open_fields - matched:
+            for m in pattern.finditer(_text_prefix(section, window).lower()):
+                start = m.start()
+                for field, size, prefix_chars in hits[m.group(1)]:
+                    if start + size <= prefix_chars:
+                        matched.add(field)
+
+        full_text = None
+        for field, limit in max_chars.items():
+            if field in matched and field in open_fields:
+                if full_text is None:
+                    full_text = section.get_text(separator="\n", strip=True)
+                found[field] = full_text[:limit]
+                if found[field]:
+                    open_fields.discard(field)
+        if not open_fields:
+            break
+    return found
 
 class WeddingScraper:
     """Scraper for wedding websites like The Knot, Zola, etc."""
@@ -35,11 +460,24 @@ class WeddingScraper:
         "weddingwire.us": True,   # US domain variant
     }
 
-    def __init__(self):
-        """Initialize the scraper with an HTTP client and optional browser."""
+    # Max subpages fetched at once when the site works over plain HTTP
+    SUBPAGE_CONCURRENCY = 5
+
+    # Max fetched pages remembered per scraper
+    PAGE_CACHE_SIZE = 64
+
+    def __init__(self, max_attempts: int = 4):
+        """Initialize the scraper with an HTTP client (browser fetches use the shared browser).
+
+        Args:
+            max_attempts: Max httpx tries per URL when the server fails transiently
+        """
+        self.max_attempts = max(1, max_attempts)
         self.client = httpx.AsyncClient(
+            http2=True,
             timeout=30.0,
             follow_redirects=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
             headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -54,85 +492,102 @@ class WeddingScraper:
                 "Sec-Fetch-Site": "none",
                 "Sec-Fetch-User": "?1",
                 "Upgrade-Insecure-Requests": "1",
-                "Connection": "keep-alive",
             }
         )
-        self._browser: Optional[StealthBrowser] = None
         self._use_browser_for_session = False  # Track if we needed browser for main page
+        self._static_shortcut_failed = False  # Bot-protected platform blocked plain HTTP
+        self._page_cache: "OrderedDict[str, Html]" = OrderedDict()  # URL -> HTML for this session
 
     async def close(self):
-        """Close the HTTP client and browser if open."""
+        """Close the HTTP client. The shared browser stays open for reuse."""
+        self._page_cache.clear()
         await self.client.aclose()
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
 
-    def _should_use_browser(self, url: str) -> bool:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _should_use_browser(url: str) -> bool:
         """Check if URL requires browser-based fetching."""
         parsed = urlparse(url)
         domain = parsed.netloc.lower().replace("www.", "")
-        for platform_domain, required in self.BROWSER_REQUIRED_PLATFORMS.items():
+        for platform_domain, required in WeddingScraper.BROWSER_REQUIRED_PLATFORMS.items():
             if platform_domain in domain and required:
                 return True
         return False
 
-    def _is_blocked_response(self, html: str) -> bool:
+    def _is_blocked_response(self, html: Html) -> bool:
         """Check if the response indicates we were blocked."""
         if not html or len(html) < 500:
             return True
-        blocked_indicators = [
-            "Access Denied",
-            "Please enable JavaScript",
-            "Checking your browser",
-            "Just a moment...",
-            "Enable JavaScript and cookies",
-            "Reference&#32;&#35;",  # Akamai error reference
-        ]
-        for indicator in blocked_indicators:
-            if indicator in html:
-                logger.info(f"Blocked response detected: found '{indicator}'")
-                return True
+        if isinstance(html, bytes):
+            match = _BLOCKED_BYTES_RE.search(html)
+        else:
+            match = _BLOCKED_RE.search(html)
+        if match:
+            indicator = match.group(0)
+            if isinstance(indicator, bytes):
+                indicator = indicator.decode()
+            logger.info(f"Blocked response detected: found '{indicator}'")
+            return True
         return False
 
-    def detect_platform(self, url: str) -> Optional[str]:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def detect_platform(url: str) -> Optional[str]:
         """Detect which wedding platform the URL belongs to."""
         parsed = urlparse(url)
         domain = parsed.netloc.lower().replace("www.", "")
 
-        for platform_domain, platform_name in self.SUPPORTED_PLATFORMS.items():
+        for platform_domain, platform_name in WeddingScraper.SUPPORTED_PLATFORMS.items():
             if platform_domain in domain:
                 return platform_name
 
         return None
 
-    async def _fetch_with_httpx(self, url: str) -> Optional[str]:
-        """Fetch a page using httpx (fast, but may get blocked)."""
-        try:
-            logger.info(f"Fetching with httpx: {url}")
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.text
-        except httpx.HTTPStatusError as e:
-            logger.warning(f"HTTP error {e.response.status_code} for {url}")
-            if e.response.status_code == 403 and e.response.text:
-                return e.response.text
-            return None
-        except httpx.HTTPError as e:
-            logger.warning(f"HTTP error fetching {url}: {e}")
-            return None
+    async def _fetch_with_httpx(self, url: str) -> Optional[Html]:
+        """Fetch a page using httpx (fast, but may get blocked).
+
+        See _response_html for when the body is returned undecoded.
+        Transient failures (429/502/503/504, read timeouts) are retried up to
+        max_attempts times with jittered exponential backoff.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            retries_left = attempt < self.max_attempts
+            try:
+                logger.info(f"Fetching with httpx: {url}")
+                response = await self.client.get(url)
+                if response.status_code in _RETRY_STATUSES and retries_left:
+                    delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning(f"HTTP {response.status_code} for {url}, retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return _response_html(response)
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"HTTP error {e.response.status_code} for {url}")
+                if e.response.status_code == 403 and e.response.content:
+                    return _response_html(e.response)
+                return None
+            except httpx.ReadTimeout as e:
+                if not retries_left:
+                    logger.warning(f"HTTP error fetching {url}: {e}")
+                    return None
+                delay = _retry_delay(attempt)
+                logger.warning(f"Read timeout for {url}, retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except httpx.HTTPError as e:
+                logger.warning(f"HTTP error fetching {url}: {e}")
+                return None
+        return None
 
-    async def _fetch_with_browser(self, url: str, wait_time: float = 3.0) -> Optional[str]:
+    async def _fetch_with_browser(self, url: str, wait_time: float = 1.0) -> Optional[str]:
         """Fetch a page using the stealth browser (slower, but bypasses bot protection)."""
         try:
-            if self._browser is None:
-                self._browser = StealthBrowser()
-                await self._browser.start()
-            return await self._browser.fetch_page(url, wait_time=wait_time)
+            return await fetch_with_shared_browser(url, wait_time=wait_time)
         except PlaywrightNotAvailableError:
             logger.warning("Playwright not available - cannot use browser-based scraping")
             return None
 
-    async def _fetch_page(self, url: str, wait_time: float = 3.0) -> Optional[str]:
+    async def _fetch_page(self, url: str, wait_time: float = 1.0) -> Optional[Html]:
         """Fetch a single page with tiered fallback strategy.
 
         Tier 1: httpx (fast, free)
@@ -140,11 +595,43 @@ class WeddingScraper:
 
         Args:
             url: The URL to fetch
-            wait_time: Time to wait for JS rendering (browser only)
+            wait_time: Max seconds to wait for the network to settle (browser only)
 
         Returns:
-            HTML content or None if fetch failed
+            HTML content (bytes or str from httpx, str from the browser) or None if fetch failed
         """
+        cached = self._page_cache.get(url)
+        if cached is not None:
+            logger.info(f"Using cached page for {url}")
+            self._page_cache.move_to_end(url)
+            return cached
+
+        html = await self._fetch_page_uncached(url, wait_time)
+        if html:
+            self._page_cache[url] = html
+            if len(self._page_cache) > self.PAGE_CACHE_SIZE:
+                self._page_cache.popitem(last=False)
+        return html
+
+    async def _try_static_shortcut(self, url: str) -> Optional[Html]:
+        """Try a bot-protected platform over plain HTTP, giving up for the session on failure."""
+        logger.info(f"Trying static fetch before browser for {url}")
+        html = await self._fetch_with_httpx(url)
+        # Small pages are usually JS shells or challenge pages
+        if html and len(html) >= 5000 and not self._is_blocked_response(html):
+            return html
+        self._static_shortcut_failed = True
+        return None
+
+    async def _fetch_page_uncached(self, url: str, wait_time: float) -> Optional[Html]:
+        """Run the httpx -> browser tiers for one URL."""
+        # Bot-protected platforms: one plain-HTTP attempt per session before the
+        # browser - when it gets through it saves a multi-second render
+        if not self._use_browser_for_session and not self._static_shortcut_failed and self._should_use_browser(url):
+            html = await self._try_static_shortcut(url)
+            if html:
+                return html
+
         # If we already know we need browser for this session, skip httpx
         if self._use_browser_for_session or self._should_use_browser(url):
             logger.info(f"Using browser for {url} (known to require it)")
@@ -184,21 +671,8 @@ class WeddingScraper:
         parsed_base = urlparse(base_url)
         base_path = parsed_base.path.rstrip("/")
 
-        # Look for navigation elements
-        nav_elements = soup.find_all(['nav', 'header'])
-
-        # Also look for common nav class patterns
-        nav_class_patterns = [
-            '[class*="nav"]', '[class*="Nav"]', '[class*="menu"]', '[class*="Menu"]',
-            '[role="navigation"]', '[class*="header"]', '[class*="Header"]'
-        ]
-        for pattern in nav_class_patterns:
-            try:
-                for elem in soup.select(pattern):
-                    if elem not in nav_elements:
-                        nav_elements.append(elem)
-            except Exception:
-                pass
+        # Look for navigation elements and common nav class patterns in one pass
+        nav_elements = soup.find_all(_is_nav_element)
 
         logger.info(f"Found {len(nav_elements)} navigation elements to scan")
 
@@ -210,13 +684,13 @@ class WeddingScraper:
                 # Skip empty links, anchors, external links
                 if not link_text or len(link_text) > 50:  # Nav links are typically short
                     continue
-                if href.startswith('#') or href.startswith('javascript:') or href.startswith('mailto:'):
+                if href.startswith(_SKIP_HREF_PREFIXES):
                     continue
 
                 # Make absolute URL
                 if href.startswith('/'):
                     full_url = f"{parsed_base.scheme}://{parsed_base.netloc}{href}"
-                elif not href.startswith('http'):
+                elif not href.startswith(_ABSOLUTE_PREFIXES):
                     full_url = urljoin(base_url, href)
                 else:
                     full_url = href
@@ -247,16 +721,9 @@ class WeddingScraper:
                     })
                     logger.info(f"Found nav link: '{link_text}' -> {full_url}")
 
-        # Deduplicate by URL, keeping first occurrence
-        unique_links = []
-        final_urls = set()
-        for link in nav_links:
-            if link['url'] not in final_urls:
-                final_urls.add(link['url'])
-                unique_links.append(link)
-
-        logger.info(f"Nav-based discovery found {len(unique_links)} subpages")
-        return unique_links[:10]  # Limit to 10 sub-pages
+        # nav_links is already unique by URL (seen_urls)
+        logger.info(f"Nav-based discovery found {len(nav_links)} subpages")
+        return nav_links[:10]  # Limit to 10 sub-pages
 
     def _find_subpages(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Find navigation links to sub-pages on wedding websites.
@@ -288,13 +755,13 @@ class WeddingScraper:
             href = link["href"]
 
             # Skip external links, anchors, and javascript
-            if href.startswith("#") or href.startswith("javascript:") or href.startswith("mailto:"):
+            if href.startswith(_SKIP_HREF_PREFIXES):
                 continue
 
             # Make absolute URL
             if href.startswith("/"):
                 full_url = f"{parsed_base.scheme}://{parsed_base.netloc}{href}"
-            elif not href.startswith("http"):
+            elif not href.startswith(_ABSOLUTE_PREFIXES):
                 full_url = urljoin(base_url, href)
             else:
                 full_url = href
@@ -358,7 +825,8 @@ class WeddingScraper:
 
         # Fetch main page
         logger.info(f"Scraping {url} (platform: {platform})")
-        html = await self._fetch_page(url)
+        # Nav links on the home page are often rendered client-side - allow a bit longer
+        html = await self._fetch_page(url, wait_time=2.0)
         if not html:
             # Check if this is a bot-protected site
             if platform in ["the_knot", "weddingwire"]:
@@ -373,10 +841,10 @@ class WeddingScraper:
             }
 
         try:
-            soup = BeautifulSoup(html, "html.parser")
+            soup = _make_soup(html)
 
             # Try to get JSON-LD structured data first (works on many platforms)
-            json_ld_data = self._extract_json_ld(soup)
+            json_ld_data = self._extract_json_ld(soup, html)
 
             # Find subpages using nav-based discovery (preferred) or keyword fallback
             nav_links = self._find_nav_subpages(soup, url)
@@ -428,35 +896,26 @@ class WeddingScraper:
 
             subpage_content = {}
 
-            # Pages that need extra wait time for JS to render hotel/accommodation info
-            slow_render_keywords = ["travel", "accommodations", "hotels", "stay", "lodging"]
+            if self._use_browser_for_session or self._should_use_browser(url):
+                # Use sequential fetching with the shared browser to avoid rate limiting
+                # Parallel browsers were causing all subpages to timeout
+                logger.info(f"Fetching {len(nav_links)} subpages sequentially")
+                results = [await self._scrape_subpage(link) for link in nav_links]
+            else:
+                # Plain HTTP site - fetch subpages concurrently over the pooled client
+                logger.info(f"Fetching {len(nav_links)} subpages concurrently")
+                semaphore = asyncio.Semaphore(self.SUBPAGE_CONCURRENCY)
 
-            # Use sequential fetching with the existing browser to avoid rate limiting
-            # Parallel browsers were causing all subpages to timeout
-            logger.info(f"Fetching {len(nav_links)} subpages sequentially")
+                async def scrape_bounded(link: Dict[str, str]) -> Optional[str]:
+                    async with semaphore:
+                        return await self._scrape_subpage(link)
 
-            for link in nav_links:
-                subpage_url = link['url']
-                nav_name = link['name']  # Use nav link text as the page identifier
-                display_name = link['display_name']
-
-                needs_extra_wait = any(slow in nav_name.lower() for slow in slow_render_keywords)
-                wait_time = 3.0 if needs_extra_wait else 2.0
-
-                logger.info(f"Fetching subpage: '{display_name}' ({subpage_url}) (wait={wait_time}s)")
-
-                try:
-                    subpage_html = await self._fetch_page(subpage_url, wait_time=wait_time)
-                    if subpage_html:
-                        subpage_soup = BeautifulSoup(subpage_html, "html.parser")
-                        content = self._extract_main_content(subpage_soup, nav_name)
-                        logger.info(f"Successfully scraped subpage: '{display_name}' ({len(content)} chars)")
-                        # Use nav link name as key for better content disaggregation
-                        subpage_content[nav_name] = content
-                    else:
-                        logger.warning(f"Failed to fetch subpage: '{display_name}'")
-                except Exception as e:
-                    logger.error(f"Error fetching subpage '{display_name}': {e}")
+                results = await asyncio.gather(*(scrape_bounded(link) for link in nav_links))
+
+            for link, content in zip(nav_links, results):
+                if content is not None:
+                    # Use nav link name as key for better content disaggregation
+                    subpage_content[link['name']] = content
 
             # Diagnostic logging for subpage content
             logger.info(f"Subpage content keys: {list(subpage_content.keys())}")
@@ -482,15 +941,46 @@ class WeddingScraper:
                 "url": url
             }
 
-    def _extract_json_ld(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    async def _scrape_subpage(self, link: Dict[str, str]) -> Optional[str]:
+        """Fetch one nav subpage and extract its main content (None on failure)."""
+        subpage_url = link['url']
+        nav_name = link['name']  # Use nav link text as the page identifier
+        display_name = link['display_name']
+
+        # Pages that need extra wait time for JS to render hotel/accommodation info
+        needs_extra_wait = any(slow in nav_name.lower() for slow in _SLOW_RENDER_KEYWORDS)
+        wait_time = 2.0 if needs_extra_wait else 1.0
+
+        logger.info(f"Fetching subpage: '{display_name}' ({subpage_url}) (wait={wait_time}s)")
+
+        try:
+            subpage_html = await self._fetch_page(subpage_url, wait_time=wait_time)
+            if subpage_html:
+                content = self._extract_subpage_content(subpage_html, nav_name)
+                logger.info(f"Successfully scraped subpage: '{display_name}' ({len(content)} chars)")
+                return content
+            logger.warning(f"Failed to fetch subpage: '{display_name}'")
+        except Exception as e:
+            logger.error(f"Error fetching subpage '{display_name}': {e}")
+        return None
+
+    def _extract_json_ld(self, soup: BeautifulSoup, html: Html) -> Dict[str, Any]:
         """Extract JSON-LD structured data from the page."""
         json_ld_data = {}
+
+        # Most wedding sites ship no JSON-LD - skip the tree walk unless the
+        # raw HTML mentions it
+        marker = b"ld+json" if isinstance(html, bytes) else "ld+json"
+        if marker not in html:
+            return json_ld_data
+
         scripts = soup.find_all("script", type="application/ld+json")
 
         for script in scripts:
             try:
                 if script.string:
-                    data = json.loads(script.string)
+                    # orjson only takes exact str/bytes, not bs4's str subclass
+                    data = _loads(str(script.string))
                     # Handle both single objects and arrays
                     if isinstance(data, list):
                         for item in data:
@@ -498,26 +988,20 @@ class WeddingScraper:
                                 json_ld_data.update(item)
                     elif isinstance(data, dict):
                         json_ld_data.update(data)
-            except json.JSONDecodeError:
+            except ValueError:  # json and orjson decode errors
                 continue
 
         return json_ld_data
 
-    def _extract_couple_from_url(self, url: str) -> Optional[str]:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _extract_couple_from_url(url: str) -> Optional[str]:
         """Try to extract couple names from URL path."""
         parsed = urlparse(url)
         path = parsed.path.lower()
 
-        # Common patterns: /us/jane-and-john, /wedding/jane-john, etc.
-        patterns = [
-            r"/us/([a-z]+)-and-([a-z]+)",
-            r"/wedding/([a-z]+)-([a-z]+)",
-            r"/([a-z]+)-and-([a-z]+)",
-            r"/([a-z]+)-([a-z]+)-wedding",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, path)
+        for pattern in _COUPLE_URL_PATTERNS:
+            match = pattern.search(path)
             if match:
                 name1 = match.group(1).title()
                 name2 = match.group(2).title()
@@ -525,120 +1009,125 @@ class WeddingScraper:
 
         return None
 
-    def _clean_page_text(self, text: str) -> str:
+    @staticmethod
+    def _clean_page_text(text: str) -> str:
         """Remove garbage from scraped text (icons, cookie policy, etc.)."""
         lines = text.split('\n')
         cleaned = []
         for line in lines:
             line = line.strip()
-            if not line or len(line) < 3:
-                continue
-            # Skip icon names (single underscore-separated lowercase words)
-            if re.match(r'^[a-z_]+$', line) and len(line) < 30:
+            # Skip very short strings, icon names, bare numbers and prices
+            if len(line) < 3 or _JUNK_LINE_RE.match(line):
                 continue
+            line_lower = line.lower()
             # Skip cookie policy boilerplate
-            if 'cookie' in line.lower() and len(line) > 100:
+            if 'cookie' in line_lower and len(line) > 100:
                 continue
-            if 'privacy' in line.lower() and 'choices' in line.lower():
-                continue
-            # Skip single numbers or very short strings
-            if re.match(r'^[\d\s]+$', line):
+            if 'privacy' in line_lower and 'choices' in line_lower:
                 continue
             # Skip registry/shop-related content that pollutes travel pages
-            registry_indicators = ['needs 1 of', 'shop registry', 'gift providers',
-                                   'our wish list', 'filter/sort', 'price low to high',
-                                   'price high to low', 'cash fund', 'honeymoon fund',
-                                   'gift any amount', 'purchased', 'add to cart',
-                                   'target™', 'threshold™', 'brightroom™', 'amazon.com']
-            if any(indicator in line.lower() for indicator in registry_indicators):
-                continue
-            # Skip lines that look like product listings (price patterns)
-            if re.match(r'^\$[\d,]+\.?\d*$', line):
+            if _REGISTRY_LINE_RE.search(line_lower):
                 continue
             cleaned.append(line)
         return '\n'.join(cleaned)
 
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _clean_subpage_text(text: str) -> str:
+        """Memoized _clean_page_text for extracted subpage content.
+
+        Subpage content is capped at a few thousand chars, and rescraping a
+        site (setup retries, re-imports) yields the same strings again.
+        """
+        return WeddingScraper._clean_page_text(text)
+
+    def _extract_subpage_content(self, html: Html, page_name: str) -> str:
+        """Extract main content from a subpage's HTML.
+
+        Plain pages are handled by the lexbor parser when selectolax is
+        installed. Travel and Q&A pages need the section scoring in
+        _extract_main_content, so they always go through BeautifulSoup.
+        """
+        name_lower = page_name.lower()
+        needs_sections = any(kw in name_lower for kw in _TRAVEL_PAGE_NAMES + _QA_PAGE_NAMES)
+        if LexborHTMLParser is not None and not needs_sections:
+            try:
+                return self._extract_plain_content(html)
+            except Exception as e:
+                logger.warning(f"lexbor extraction failed for '{page_name}', using BeautifulSoup: {e}")
+
+        soup = _make_soup(html, parse_only=_BODY_ONLY)
+        if soup.body is None:
+            # Fragment without a <body> (only possible with html.parser)
+            soup = _make_soup(html)
+        return self._extract_main_content(soup, page_name)
+
+    def _extract_plain_content(self, html: Html) -> str:
+        """Lexbor version of _extract_main_content's default path (main area or whole page)."""
+        tree = LexborHTMLParser(html)
+
+        # Script/style text is never page content (BeautifulSoup's get_text skips it too)
+        for node in tree.css(", ".join(["script", "style", "template"] + _NON_CONTENT_SELECTORS)):
+            node.remove()
+
+        main_elem = tree.css_first("main")
+        text = (main_elem or tree.root).text(separator="\n", strip=True)
+        return self._clean_page_text(text)[:5000]
+
     def _extract_main_content(self, soup: BeautifulSoup, page_name: str) -> str:
         """Extract main content from a page, excluding sidebars and widgets.
 
         This is especially important for The Knot which has persistent registry
         sidebars that pollute the content extraction.
-        """
-        # Make a copy of soup to avoid modifying the original
-        from copy import copy
-        soup_copy = BeautifulSoup(str(soup), 'html.parser')
 
+        Non-content elements are removed from the soup in place, so pass a
+        tree that isn't needed afterwards.
+        """
         # Remove known non-content elements (registry sidebars, footers, etc.)
-        selectors_to_remove = [
-            '[data-testid*="registry"]',  # Registry widgets
-            '[class*="registry"]',
-            '[class*="Registry"]',
-            '[class*="sidebar"]',
-            '[class*="Sidebar"]',
-            '[class*="gift-list"]',
-            '[class*="GiftList"]',
-            '[class*="wishlist"]',
-            '[class*="WishList"]',
-            'aside',  # Sidebars
-            '[role="complementary"]',  # Accessibility sidebars
-            'footer',
-            '[class*="footer"]',
-            '[class*="Footer"]',
-            '[class*="cookie"]',
-            '[class*="Cookie"]',
-            '[class*="consent"]',
-            '[class*="Consent"]',
-            '[class*="modal"]',
-            '[class*="Modal"]',
-            '[class*="popup"]',
-            '[class*="Popup"]',
-        ]
-
-        for selector in selectors_to_remove:
-            try:
-                for elem in soup_copy.select(selector):
-                    elem.decompose()
-            except Exception:
-                pass  # Some selectors might not match
+        # in one pass; matches nested in an already-removed element are skipped
+        for elem in _NON_CONTENT_SEL.select(soup):
+            if not elem.decomposed:
+                elem.decompose()
 
         # For travel/accommodation pages, look for specific content areas
-        travel_keywords = ['travel', 'hotel', 'accommod', 'stay', 'lodging', 'where to stay',
-                          'room block', 'book your room', 'reserv', 'check-in', 'check-out',
-                          'courtyard', 'marriott', 'hilton', 'hyatt', 'inn', 'suites']
-        if any(kw in page_name.lower() for kw in ['travel', 'accommodations', 'hotels']):
+        if any(kw in page_name.lower() for kw in _TRAVEL_PAGE_NAMES):
             # Collect ALL hotel sections, not just the best one
             hotel_sections = []
             seen_texts = set()  # Avoid duplicates
+            accepted_ids = set()  # Sections already collected - their text covers descendants
 
             # Look for sections with travel-related content
-            for section in soup_copy.find_all(['main', 'article', 'section', 'div']):
-                section_text = section.get_text(strip=True)
-                section_text_lower = section_text.lower()
-                section_class = ' '.join(section.get('class', [])).lower()
-                section_id = (section.get('id') or '').lower()
-
-                # Skip sections that look like registry/product listings
-                if any(x in section_text_lower for x in ['needs 1 of', 'add to cart', 'shop registry', 'our wish list']):
+            for section in _iter_tags(soup, _TRAVEL_SECTION_TAGS):
+                # Nested inside a collected section: same hotel text, skip the walk
+                if accepted_ids and any(id(parent) in accepted_ids for parent in section.parents):
                     continue
 
+                # One tree walk per section; scoring, fingerprint and output share it.
+                # The walk stops past 10000 chars, so containers are dropped unread.
+                section_text = _text_prefix(section, 10001, "\n")
+
                 # Skip very short or very long sections (likely nav or containers)
                 if len(section_text) < 100 or len(section_text) > 10000:
                     continue
 
+                # Skip sections that look like registry/product listings
+                # (checked before lowering so rejected sections aren't copied)
+                if _REGISTRY_SECTION_RE.search(section_text):
+                    continue
+                section_text_lower = section_text.lower()
+
                 # Score this section based on hotel-related content
                 score = 0
 
-                # Check for travel keywords (search more of the text)
-                for kw in travel_keywords:
-                    if kw in section_text_lower[:2000]:
-                        score += 1
+                # One point per distinct travel keyword (search more of the text)
+                score += len(set(_TRAVEL_KEYWORD_RE.findall(section_text_lower[:2000])))
 
                 # Bonus points for phone number pattern (hotels have phone numbers)
-                if re.search(r'\(\d{3}\)\s*\d{3}[-.]?\d{4}', section_text):
+                if _PHONE_RE.search(section_text):
                     score += 5
 
                 # Bonus for address-like pattern (street addresses)
-                if re.search(r'\d+\s+\w+\s+(st|street|ave|avenue|blvd|boulevard|rd|road|dr|drive|ln|lane)', section_text_lower):
+                if _STREET_RE.search(section_text_lower):
                     score += 5
 
                 # Bonus for check-in/check-out dates
@@ -646,7 +1135,8 @@ class WeddingScraper:
                     score += 10
 
                 # Is it a travel section by class/id?
-                if any(kw in section_class or kw in section_id for kw in ['travel', 'hotel', 'accommod']):
+                class_id = _class_id(section)
+                if any(kw in class_id for kw in ['travel', 'hotel', 'accommod']):
                     score += 3
 
                 # Collect sections with decent hotel-related scores
@@ -655,9 +1145,9 @@ class WeddingScraper:
                     fingerprint = section_text[:100]
                     if fingerprint not in seen_texts:
                         seen_texts.add(fingerprint)
-                        content = section.get_text(separator="\n", strip=True)
-                        hotel_sections.append((score, content))
-                        logger.info(f"Found hotel section: score={score}, length={len(content)}")
+                        accepted_ids.add(id(section))
+                        hotel_sections.append((score, section_text))
+                        logger.info(f"Found hotel section: score={score}, length={len(section_text)}")
 
             if hotel_sections:
                 # Sort by score descending and combine all
@@ -667,33 +1157,34 @@ class WeddingScraper:
                 return self._clean_page_text(combined)[:8000]  # Increased limit for multiple hotels
 
         # For Q&A/FAQ pages, look for question/answer content
-        if any(kw in page_name.lower() for kw in ['q-a', 'qa', 'faq']):
+        if any(kw in page_name.lower() for kw in _QA_PAGE_NAMES):
             qa_content = []
-            # Look for FAQ-style elements
-            for elem in soup_copy.find_all(['details', 'summary', 'dt', 'dd']):
-                qa_content.append(elem.get_text(strip=True))
-
-            # Also look for elements with FAQ-like classes
-            for selector in ['[class*="faq"]', '[class*="Faq"]', '[class*="question"]',
-                           '[class*="Question"]', '[class*="answer"]', '[class*="Answer"]']:
-                try:
-                    for elem in soup_copy.select(selector):
-                        text = elem.get_text(separator="\n", strip=True)
-                        if text and text not in qa_content:
-                            qa_content.append(text)
-                except Exception:
-                    pass
+            class_texts = []
+            # FAQ-style elements and elements with FAQ-like classes, in one walk
+            for elem in _QA_SEL.select(soup):
+                if elem.name in _QA_TAGS:
+                    qa_content.append(elem.get_text(strip=True))
+                if _QA_CLASS_SEL.match(elem):
+                    class_texts.append(elem.get_text(separator="\n", strip=True))
+
+            # Class matches follow the FAQ elements, minus repeats (set lookup,
+            # not a scan of the growing list)
+            seen = set(qa_content)
+            for text in class_texts:
+                if text and text not in seen:
+                    seen.add(text)
+                    qa_content.append(text)
 
             if qa_content:
                 return self._clean_page_text('\n'.join(qa_content))[:5000]
 
         # Default: try to find the main content area
-        main_elem = soup_copy.find('main') or soup_copy.find('[role="main"]')
+        main_elem = soup.find('main') or soup.find('[role="main"]')
         if main_elem:
             return self._clean_page_text(main_elem.get_text(separator="\n", strip=True))[:5000]
 
         # Fallback: get all text but clean it aggressively
-        return self._clean_page_text(soup_copy.get_text(separator="\n", strip=True))[:5000]
+        return self._clean_page_text(soup.get_text(separator="\n", strip=True))[:5000]
 
     async def _scrape_the_knot(self, soup: BeautifulSoup, url: str, json_ld: Dict, subpage_content: Dict[str, str] = None, pages_available: List[Dict] = None) -> Dict[str, Any]:
         """Scrape The Knot wedding website with enhanced extraction."""
@@ -702,7 +1193,7 @@ class WeddingScraper:
         data = {
             "platform": "the_knot",
             "url": url,
-            "scraped_at": datetime.utcnow().isoformat(),
+            "scraped_at": _scraped_at(),
             "pages_scraped": ["home"] + list(subpage_content.keys()),
             "pages_available": pages_available  # Photos/registry pages to redirect to
         }
@@ -721,102 +1212,54 @@ class WeddingScraper:
         # Extract from title as fallback
         title = soup.find("title")
         if title:
-            data["page_title"] = title.get_text(strip=True)
+            title_text = title.get_text(strip=True)
+            data["page_title"] = title_text
             if not data.get("couple_names"):
                 # Parse from title like "Jane & John's Wedding Website"
-                title_text = title.get_text(strip=True)
-                match = re.search(r"^([^']+)'s", title_text)
+                match = _TITLE_POSSESSIVE_RE.search(title_text)
                 if match:
                     data["couple_names"] = match.group(1)
 
         # Look for wedding date - try multiple approaches
         # 1. Look for specific date elements
-        date_elem = soup.find(attrs={"data-testid": re.compile(r"date", re.I)})
+        date_elem = soup.find(attrs={"data-testid": _is_date_testid})
         if date_elem:
             data["wedding_date_text"] = date_elem.get_text(strip=True)
         else:
             # 2. Look for date patterns in text
-            date_pattern = re.compile(r"(\w+\s+\d{1,2},?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4})")
-            for elem in soup.find_all(["p", "div", "span", "h2", "h3"]):
-                text = elem.get_text(strip=True)
-                match = date_pattern.search(text)
-                if match and len(text) < 100:  # Avoid grabbing from long paragraphs
-                    data["wedding_date_text"] = match.group(1)
-                    break
-
-        # Look for venue/location sections
-        venue_keywords = ["venue", "location", "ceremony", "reception", "where", "place"]
-        for section in soup.find_all(["section", "div", "article"]):
-            section_class = " ".join(section.get("class", []))
-            section_id = section.get("id", "")
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            if any(kw in section_class.lower() or kw in section_id.lower() or kw in section_text for kw in venue_keywords):
-                if not data.get("venue_info"):
-                    data["venue_info"] = section.get_text(separator="\n", strip=True)[:2000]
-
-        # Look for registry links
+            date_text = _find_short_date(soup, _DATE_RE)
+            if date_text:
+                data["wedding_date_text"] = date_text
+
+        # Venue, travel, schedule and FAQ sections in one pass over the tree
+        data.update(_classify_sections(soup, _KNOT_SECTIONS, match_attrs=True))
+
+        # Registry and RSVP links in one pass over the anchors
         registry_links = []
-        registry_stores = ["amazon", "target", "crate", "williams-sonoma", "registry", "bloomingdale",
-                          "bed bath", "pottery barn", "macy", "zola", "honeyfund"]
+        seen_hrefs = set()  # Nav, body and footer often link the same registry
         for link in soup.find_all("a", href=True):
-            href = link["href"].lower()
-            link_text = link.get_text(strip=True).lower()
-            if any(store in href or store in link_text for store in registry_stores):
+            href = link["href"]
+            if "rsvp_url" not in data and "rsvp" in href.lower():
+                data["rsvp_url"] = urljoin(url, href) if href.startswith("/") else href
+            if href in seen_hrefs:
+                continue
+            text = link.get_text(strip=True)
+            if _REGISTRY_STORES_RE.search(href) or _REGISTRY_STORES_RE.search(text):
+                seen_hrefs.add(href)
                 registry_links.append({
-                    "text": link.get_text(strip=True),
-                    "url": link["href"]
+                    "text": text,
+                    "url": href
                 })
         if registry_links:
             data["registry_links"] = registry_links
 
-        # Look for travel/hotel info
-        travel_keywords = ["travel", "hotel", "accommod", "stay", "lodging", "where to stay"]
-        for section in soup.find_all(["section", "div", "article"]):
-            section_class = " ".join(section.get("class", []))
-            section_id = section.get("id", "")
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            if any(kw in section_class.lower() or kw in section_id.lower() or kw in section_text for kw in travel_keywords):
-                if not data.get("travel_info"):
-                    data["travel_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-        # Look for schedule/events
-        schedule_keywords = ["schedule", "event", "itinerary", "timeline", "weekend", "activities"]
-        for section in soup.find_all(["section", "div", "article"]):
-            section_class = " ".join(section.get("class", []))
-            section_id = section.get("id", "")
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            if any(kw in section_class.lower() or kw in section_id.lower() or kw in section_text for kw in schedule_keywords):
-                if not data.get("schedule_info"):
-                    data["schedule_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-        # Look for FAQ section
-        faq_keywords = ["faq", "question", "q&a", "q & a"]
-        for section in soup.find_all(["section", "div", "article"]):
-            section_class = " ".join(section.get("class", []))
-            section_id = section.get("id", "")
-            section_text = section.get_text(strip=True).lower()[:100]
-
-            if any(kw in section_class.lower() or kw in section_id.lower() or kw in section_text for kw in faq_keywords):
-                if not data.get("faq_info"):
-                    data["faq_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-        # Look for RSVP link
-        rsvp_link = soup.find("a", href=re.compile(r"rsvp", re.I))
-        if rsvp_link:
-            href = rsvp_link["href"]
-            if href.startswith("/"):
-                href = urljoin(url, href)
-            data["rsvp_url"] = href
-
         # Look for dress code
         dress_keywords = ["dress code", "attire", "what to wear", "dress"]
         for elem in soup.find_all(["p", "div", "span", "li"]):
-            text = elem.get_text(strip=True).lower()
+            raw_text = _text_prefix(elem, 500)
+            text = raw_text.lower()
             if any(kw in text for kw in dress_keywords) and len(text) < 500:
-                data["dress_code_info"] = elem.get_text(strip=True)
+                data["dress_code_info"] = raw_text
                 break
 
         # Include JSON-LD if found
@@ -832,37 +1275,26 @@ class WeddingScraper:
         priority_pages = ['travel', 'accommodations', 'hotels', 'q-a', 'faq']
         other_pages = [k for k in subpage_content.keys() if k not in priority_pages]
 
-        subpage_texts = []
-        # Add priority pages first
-        for page_name in priority_pages:
-            if page_name in subpage_content:
-                cleaned_content = self._clean_page_text(subpage_content[page_name])
-                subpage_texts.append(f"\n\n=== {page_name.upper()} PAGE ===\n{cleaned_content}")
-        # Then add other pages
-        for page_name in other_pages:
-            cleaned_content = self._clean_page_text(subpage_content[page_name])
-            subpage_texts.append(f"\n\n=== {page_name.upper()} PAGE ===\n{cleaned_content}")
-
-        combined_text = main_text + "".join(subpage_texts)
-
-        # Add note about available pages (photos/registry) that weren't scraped
-        # This tells Claude to redirect users to view these on the couple's website
-        if pages_available:
-            available_note = "\n\n=== PAGES TO REDIRECT GUESTS TO ===\n"
-            available_note += "The following pages are available on the couple's wedding website. "
-            available_note += "Direct guests to visit these URLs to view this content:\n"
-            for page in pages_available:
-                available_note += f"- {page['name']}: {page['url']}\n"
-            combined_text += available_note
-
-        data["full_text"] = combined_text[:30000]  # Increased to ensure travel content included
-
-        # Diagnostic logging
-        logger.info(f"full_text total length: {len(data['full_text'])} chars")
-        logger.info(f"Contains TRAVEL marker: {'=== TRAVEL PAGE ===' in data['full_text']}")
-        if '=== TRAVEL PAGE ===' in data['full_text']:
-            travel_start = data['full_text'].find('=== TRAVEL PAGE ===')
-            logger.info(f"Travel content preview: {data['full_text'][travel_start:travel_start+300]}")
+        # Priority pages first, then the rest
+        ordered_pages = [p for p in priority_pages if p in subpage_content] + other_pages
+        subpage_texts = (
+            f"\n\n=== {page_name.upper()} PAGE ===\n{self._clean_subpage_text(subpage_content[page_name])}"
+            for page_name in ordered_pages
+        )
+
+        # Note about available pages (photos/registry) that weren't scraped goes last
+        data["full_text"] = _join_capped(  # 30000 cap, packed by page priority
+            itertools.chain([main_text], subpage_texts, [_redirect_note(pages_available)]), 30000
+        )
+
+        # Diagnostic logging (skipped entirely, scans included, when INFO is off)
+        if logger.isEnabledFor(logging.INFO):
+            full_text = data['full_text']
+            travel_start = full_text.find('=== TRAVEL PAGE ===')
+            logger.info(f"full_text total length: {len(full_text)} chars")
+            logger.info(f"Contains TRAVEL marker: {travel_start >= 0}")
+            if travel_start >= 0:
+                logger.info(f"Travel content preview: {full_text[travel_start:travel_start+300]}")
 
         return data
 
@@ -873,7 +1305,7 @@ class WeddingScraper:
         data = {
             "platform": "zola",
             "url": url,
-            "scraped_at": datetime.utcnow().isoformat(),
+            "scraped_at": _scraped_at(),
             "pages_scraped": ["home"] + list(subpage_content.keys()),
             "pages_available": pages_available
         }
@@ -882,25 +1314,22 @@ class WeddingScraper:
         scripts = soup.find_all("script")
         for script in scripts:
             if script.string:
+                # Plain str: orjson rejects bs4's str subclass
+                script_text = str(script.string)
+
                 # Look for PRELOADED_STATE
-                if "window.__PRELOADED_STATE__" in script.string:
+                if "window.__PRELOADED_STATE__" in script_text:
+                    # Only the flag is kept; the decoded store runs to megabytes
+                    # and is persisted with the scrape
                     data["has_preloaded_state"] = True
-                    # Try to extract JSON
-                    match = re.search(r'window\.__PRELOADED_STATE__\s*=\s*({.*?});?\s*(?:</script>|$)',
-                                     script.string, re.DOTALL)
-                    if match:
-                        try:
-                            preloaded = json.loads(match.group(1))
-                            data["preloaded_state"] = preloaded
-                        except json.JSONDecodeError:
-                            pass
 
                 # Look for NEXT_DATA (Zola might use Next.js)
-                if "__NEXT_DATA__" in script.string:
+                if "__NEXT_DATA__" in script_text:
                     try:
-                        next_data = json.loads(script.string)
-                        data["next_data"] = next_data
-                    except json.JSONDecodeError:
+                        extract = _extract_paths(_loads(script_text), _NEXT_DATA_KEEP_PATHS)
+                        if extract:
+                            data["page_props_extract"] = extract
+                    except ValueError:  # json and orjson decode errors
                         pass
 
         # Extract couple names from URL
@@ -920,31 +1349,20 @@ class WeddingScraper:
                 data["couple_names"] = h1_text
 
         # Look for date
-        for elem in soup.find_all(["h2", "h3", "p", "div", "span"]):
-            text = elem.get_text(strip=True)
-            date_match = re.search(r"(\w+\s+\d{1,2},?\s+\d{4})", text)
-            if date_match and len(text) < 100:
-                data["wedding_date_text"] = date_match.group(1)
-                break
+        date_text = _find_short_date(soup, _WRITTEN_DATE_RE)
+        if date_text:
+            data["wedding_date_text"] = date_text
 
         # Look for sections by content
-        for section in soup.find_all(["section", "div"]):
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            if ("hotel" in section_text or "accommodation" in section_text or "stay" in section_text) and not data.get("travel_info"):
-                data["travel_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-            if ("schedule" in section_text or "event" in section_text or "itinerary" in section_text) and not data.get("schedule_info"):
-                data["schedule_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-            if ("registry" in section_text or "gift" in section_text) and not data.get("registry_info"):
-                data["registry_info"] = section.get_text(separator="\n", strip=True)[:2000]
+        data.update(_classify_sections(soup, _ZOLA_SECTIONS, tags=["section", "div"]))
 
         # Find registry links
         registry_links = []
+        seen_hrefs = set()
         for link in soup.find_all("a", href=True):
             href = link["href"].lower()
-            if "registry" in href or "gift" in href:
+            if ("registry" in href or "gift" in href) and link["href"] not in seen_hrefs:
+                seen_hrefs.add(link["href"])
                 registry_links.append({
                     "text": link.get_text(strip=True),
                     "url": link["href"]
@@ -956,23 +1374,16 @@ class WeddingScraper:
         if json_ld:
             data["json_ld"] = json_ld
 
-        # Extract full text with subpage content
-        main_text = soup.get_text(separator="\n", strip=True)[:8000]
-        subpage_texts = []
-        for page_name, content in subpage_content.items():
-            subpage_texts.append(f"\n\n=== {page_name.upper()} PAGE ===\n{content}")
-        combined_text = main_text + "".join(subpage_texts)
-
-        # Add note about available pages (photos/registry) that weren't scraped
-        if pages_available:
-            available_note = "\n\n=== PAGES TO REDIRECT GUESTS TO ===\n"
-            available_note += "The following pages are available on the couple's wedding website. "
-            available_note += "Direct guests to visit these URLs to view this content:\n"
-            for page in pages_available:
-                available_note += f"- {page['name']}: {page['url']}\n"
-            combined_text += available_note
-
-        data["full_text"] = combined_text[:20000]
+        # Extract full text with subpage content, then the note about
+        # available pages (photos/registry) that weren't scraped
+        main_text = _text_prefix(soup, 8000, "\n")
+        subpage_texts = (
+            f"\n\n=== {page_name.upper()} PAGE ===\n{content}"
+            for page_name, content in subpage_content.items()
+        )
+        data["full_text"] = _join_capped(
+            itertools.chain([main_text], subpage_texts, [_redirect_note(pages_available)]), 20000
+        )
 
         return data
 
@@ -983,7 +1394,7 @@ class WeddingScraper:
         data = {
             "platform": "joy",
             "url": url,
-            "scraped_at": datetime.utcnow().isoformat(),
+            "scraped_at": _scraped_at(),
             "pages_scraped": ["home"] + list(subpage_content.keys()),
             "pages_available": pages_available
         }
@@ -992,14 +1403,12 @@ class WeddingScraper:
         next_data_script = soup.find("script", id="__NEXT_DATA__")
         if next_data_script and next_data_script.string:
             try:
-                next_data = json.loads(next_data_script.string)
-                data["next_data"] = next_data
-
-                # Try to extract props
-                props = next_data.get("props", {}).get("pageProps", {})
-                if props:
-                    data["page_props"] = props
-            except json.JSONDecodeError:
+                # Keep only the event/couple props, not the whole payload
+                next_data = _loads(str(next_data_script.string))
+                extract = _extract_paths(next_data, _NEXT_DATA_KEEP_PATHS)
+                if extract:
+                    data["page_props_extract"] = extract
+            except ValueError:  # json and orjson decode errors
                 pass
 
         # Extract from URL
@@ -1019,34 +1428,26 @@ class WeddingScraper:
             data["page_title"] = title.get_text(strip=True)
 
         # Look for wedding date
-        for elem in soup.find_all(["h2", "h3", "p", "div", "span"]):
-            text = elem.get_text(strip=True)
-            date_match = re.search(r"(\w+\s+\d{1,2},?\s+\d{4})", text)
-            if date_match and len(text) < 100:
-                data["wedding_date_text"] = date_match.group(1)
-                break
+        date_text = _find_short_date(soup, _WRITTEN_DATE_RE)
+        if date_text:
+            data["wedding_date_text"] = date_text
 
         # Look for sections
-        for section in soup.find_all(["section", "div", "article"]):
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            if ("hotel" in section_text or "travel" in section_text) and not data.get("travel_info"):
-                data["travel_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-            if ("schedule" in section_text or "event" in section_text) and not data.get("schedule_info"):
-                data["schedule_info"] = section.get_text(separator="\n", strip=True)[:3000]
-
-            if ("faq" in section_text or "question" in section_text) and not data.get("faq_info"):
-                data["faq_info"] = section.get_text(separator="\n", strip=True)[:3000]
+        data.update(_classify_sections(soup, _JOY_SECTIONS))
 
         # Find registry links
         registry_links = []
+        seen_hrefs = set()
         for link in soup.find_all("a", href=True):
             href = link["href"].lower()
-            link_text = link.get_text(strip=True).lower()
+            text = link.get_text(strip=True)
+            link_text = text.lower()
             if "registry" in href or "registry" in link_text or "gift" in link_text:
+                if link["href"] in seen_hrefs:
+                    continue
+                seen_hrefs.add(link["href"])
                 registry_links.append({
-                    "text": link.get_text(strip=True),
+                    "text": text,
                     "url": link["href"]
                 })
         if registry_links:
@@ -1056,23 +1457,16 @@ class WeddingScraper:
         if json_ld:
             data["json_ld"] = json_ld
 
-        # Extract full text with subpage content
-        main_text = soup.get_text(separator="\n", strip=True)[:8000]
-        subpage_texts = []
-        for page_name, content in subpage_content.items():
-            subpage_texts.append(f"\n\n=== {page_name.upper()} PAGE ===\n{content}")
-        combined_text = main_text + "".join(subpage_texts)
-
-        # Add note about available pages (photos/registry) that weren't scraped
-        if pages_available:
-            available_note = "\n\n=== PAGES TO REDIRECT GUESTS TO ===\n"
-            available_note += "The following pages are available on the couple's wedding website. "
-            available_note += "Direct guests to visit these URLs to view this content:\n"
-            for page in pages_available:
-                available_note += f"- {page['name']}: {page['url']}\n"
-            combined_text += available_note
-
-        data["full_text"] = combined_text[:20000]
+        # Extract full text with subpage content, then the note about
+        # available pages (photos/registry) that weren't scraped
+        main_text = _text_prefix(soup, 8000, "\n")
+        subpage_texts = (
+            f"\n\n=== {page_name.upper()} PAGE ===\n{content}"
+            for page_name, content in subpage_content.items()
+        )
+        data["full_text"] = _join_capped(
+            itertools.chain([main_text], subpage_texts, [_redirect_note(pages_available)]), 20000
+        )
 
         return data
 
@@ -1090,7 +1484,7 @@ class WeddingScraper:
         data = {
             "platform": "generic",
             "url": url,
-            "scraped_at": datetime.utcnow().isoformat(),
+            "scraped_at": _scraped_at(),
             "pages_scraped": ["home"] + list(subpage_content.keys()),
             "pages_available": pages_available
         }
@@ -1116,16 +1510,12 @@ class WeddingScraper:
                     data["couple_names"] = h1_text
 
         # Look for date patterns
-        date_pattern = re.compile(r"(\w+\s+\d{1,2},?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4})")
-        for elem in soup.find_all(["p", "div", "span", "h2", "h3"]):
-            text = elem.get_text(strip=True)
-            match = date_pattern.search(text)
-            if match and len(text) < 100:
-                data["possible_date"] = match.group(1)
-                break
+        date_text = _find_short_date(soup, _DATE_RE)
+        if date_text:
+            data["possible_date"] = date_text
 
         # Address patterns
-        address_elem = soup.find(["address", "div"], class_=re.compile(r"address|location|venue", re.I))
+        address_elem = soup.find(["address", "div"], class_=_ADDRESS_CLASS_RE)
         if address_elem:
             data["possible_venue"] = address_elem.get_text(separator=", ", strip=True)
 
@@ -1133,50 +1523,31 @@ class WeddingScraper:
         links = []
         keywords = ["registry", "rsvp", "hotel", "gift", "travel", "accommod"]
         for link in soup.find_all("a", href=True):
-            text = link.get_text(strip=True).lower()
+            link_text = link.get_text(strip=True)
+            text = link_text.lower()
             href = link["href"].lower()
             if any(word in text or word in href for word in keywords):
-                links.append({"text": link.get_text(strip=True), "url": link["href"]})
+                links.append({"text": link_text, "url": link["href"]})
         if links:
             data["relevant_links"] = links
 
         # Look for common sections
-        section_keywords = {
-            "travel_info": ["hotel", "travel", "accommodation", "stay", "lodging"],
-            "schedule_info": ["schedule", "event", "itinerary", "timeline"],
-            "faq_info": ["faq", "question", "q&a"],
-            "registry_info": ["registry", "gift"],
-        }
-
-        for section in soup.find_all(["section", "div", "article"]):
-            section_text = section.get_text(strip=True).lower()[:200]
-
-            for field, keywords in section_keywords.items():
-                if not data.get(field):
-                    if any(kw in section_text for kw in keywords):
-                        data[field] = section.get_text(separator="\n", strip=True)[:3000]
+        data.update(_classify_sections(soup, _GENERIC_SECTIONS))
 
         # Include JSON-LD if found
         if json_ld:
             data["json_ld"] = json_ld
 
-        # Extract full text with subpage content
-        main_text = soup.get_text(separator="\n", strip=True)[:8000]
-        subpage_texts = []
-        for page_name, content in subpage_content.items():
-            subpage_texts.append(f"\n\n=== {page_name.upper()} PAGE ===\n{content}")
-        combined_text = main_text + "".join(subpage_texts)
-
-        # Add note about available pages (photos/registry) that weren't scraped
-        if pages_available:
-            available_note = "\n\n=== PAGES TO REDIRECT GUESTS TO ===\n"
-            available_note += "The following pages are available on the couple's wedding website. "
-            available_note += "Direct guests to visit these URLs to view this content:\n"
-            for page in pages_available:
-                available_note += f"- {page['name']}: {page['url']}\n"
-            combined_text += available_note
-
-        data["full_text"] = combined_text[:20000]
+        # Extract full text with subpage content, then the note about
+        # available pages (photos/registry) that weren't scraped
+        main_text = _text_prefix(soup, 8000, "\n")
+        subpage_texts = (
+            f"\n\n=== {page_name.upper()} PAGE ===\n{content}"
+            for page_name, content in subpage_content.items()
+        )
+        data["full_text"] = _join_capped(
+            itertools.chain([main_text], subpage_texts, [_redirect_note(pages_available)]), 20000
+        )
 
         return data
 
@@ -1,21 +1,39 @@
 """Background jobs for SMS scheduling using APScheduler."""
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm.attributes import set_committed_value
 
+from core.config import settings
 from core.database import async_session_maker
 from models.sms import ScheduledMessage, Guest, MessageLog
 from models.wedding import Wedding
-from services.sms.twilio_service import TwilioService
-from services.sms.template_service import TemplateService
+from services.sms.twilio_service import TwilioService, add_opt_out, twilio_service
+from services.sms.template_service import TemplateService, template_service
 
 logger = logging.getLogger(__name__)
 
+# Maximum in-flight Twilio requests per scheduled message. Twilio queues
+# anything above the sender's MPS limit, so this only bounds our side.
+SEND_CONCURRENCY = 10
+
+# Twilio needs send_at at least 15 minutes ahead; the extra minute covers
+# the time spent scheduling each guest
+TWILIO_SCHEDULE_MIN_LEAD = timedelta(minutes=16)
+# Messages are handed to Twilio only this close to send time, so guest list,
+# consent and wedding details are as current as a polled send. The window
+# spans a few runs of the 5-minute process_fixed_schedules job.
+TWILIO_HANDOFF_MAX_LEAD = timedelta(minutes=30)
+
+# Scheduled messages loaded per query, bounding memory on a large backlog
+MESSAGE_BATCH_SIZE = 100
+
 
 async def process_relative_schedules():
     """
@@ -29,35 +47,78 @@ async def process_relative_schedules():
 
     async with async_session_maker() as db:
         # Find all relative scheduled messages that haven't been sent
-        stmt = select(ScheduledMessage).where(
+        stmt = select(ScheduledMessage).join(ScheduledMessage.wedding).where(
             ScheduledMessage.schedule_type == "relative",
             ScheduledMessage.status == "scheduled"
-        ).options(selectinload(ScheduledMessage.wedding))
-
-        result = await db.execute(stmt)
-        messages = result.scalars().all()
+        ).options(contains_eager(ScheduledMessage.wedding))
 
         today = datetime.now().date()
-        twilio_service = TwilioService()
-        template_service = TemplateService()
 
-        for msg in messages:
-            try:
-                # Calculate the actual send date
-                send_date = calculate_send_date(msg, msg.wedding)
+        async for messages in iter_message_batches(db, stmt):
+            due = []
+            for msg in messages:
+                try:
+                    # Calculate the actual send date
+                    send_date = calculate_send_date(msg, msg.wedding)
+
+                    if send_date is None:
+                        logger.warning(f"Could not calculate send date for message {msg.id}")
+                        continue
+
+                    if send_date == today:
+                        due.append(msg)
 
-                if send_date is None:
-                    logger.warning(f"Could not calculate send date for message {msg.id}")
-                    continue
+                except Exception as e:
+                    logger.error(f"Error processing message {msg.id}: {e}")
+                    msg.status = "failed"
 
-                if send_date == today:
+            # Only messages due today need their guest lists
+            await load_wedding_guests(db, due)
+
+            for msg in due:
+                try:
                     logger.info(f"Processing relative message {msg.id} for wedding {msg.wedding_id}")
                     await send_scheduled_message(db, msg, twilio_service, template_service)
 
-            except Exception as e:
-                logger.error(f"Error processing message {msg.id}: {e}")
-                msg.status = "failed"
-                await db.commit()
+                except Exception as e:
+                    logger.error(f"Error processing message {msg.id}: {e}")
+                    msg.status = "failed"
+
+            # Persist any failures from this batch in one commit
+            await db.commit()
+
+
+async def iter_message_batches(db: AsyncSession, stmt, batch_size: int = MESSAGE_BATCH_SIZE):
+    """
+    Yield the messages matched by stmt in id-ordered batches.
+
+    Uses keyset pagination rather than a server-side cursor because
+    send_scheduled_message commits mid-batch, which would close the cursor.
+
+    Args:
+        db: Database session
+        stmt: select(ScheduledMessage) statement with filters and load options
+        batch_size: Maximum messages per batch
+
+    Yields:
+        Lists of at most batch_size messages
+    """
+    last_id = None
+    while True:
+        page = stmt.order_by(ScheduledMessage.id).limit(batch_size)
+        if last_id is not None:
+            page = page.where(ScheduledMessage.id > last_id)
+
+        result = await db.execute(page)
+        messages = result.scalars().all()
+        if not messages:
+            return
+
+        yield messages
+
+        if len(messages) < batch_size:
+            return
+        last_id = messages[-1].id
 
 
 def calculate_send_date(msg: ScheduledMessage, wedding: Wedding) -> Optional[datetime]:
@@ -94,45 +155,59 @@ async def send_scheduled_message(
     # Get wedding for template rendering
     wedding = msg.wedding
 
-    # Get targeted guests
-    guests = await get_target_guests(db, msg)
-
-    sent_count = 0
-    failed_count = 0
+    # Get targeted guests, minus any Twilio is already scheduled to text
+    handed_off = await get_handed_off_guest_ids(db, msg)
+    guests = [g for g in get_target_guests(msg) if g.id not in handed_off]
 
-    for guest in guests:
-        if guest.opted_out or not guest.sms_consent:
-            continue
+    # Wedding-level variables and the opt-out line are the same for every
+    # guest; resolve them once
+    partial = add_opt_out(template_service.render_wedding_part(msg.message_content, wedding))
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+    # One timestamp for the whole broadcast
+    sent_at = datetime.utcnow()
 
+    async def send_one(guest: Guest) -> Optional[dict]:
+        """Render and send to one guest, returning its log row (None on error)."""
         try:
             # Render message content with guest variables
-            content = template_service.render(msg.message_content, guest, wedding)
+            content = template_service.render_guest_part(partial, guest)
 
             # Send via Twilio
-            result = await twilio_service.send_sms(guest.phone_number, content)
-
-            # Log the message
-            log = MessageLog(
-                wedding_id=msg.wedding_id,
-                guest_id=guest.id,
-                scheduled_message_id=msg.id,
-                phone_number=guest.phone_number,
-                message_content=content,
-                twilio_sid=result.get("sid"),
-                status="sent" if result.get("success") else "failed",
-                error_message=result.get("error"),
-                sent_at=datetime.utcnow()
-            )
-            db.add(log)
-
-            if result.get("success"):
-                sent_count += 1
-            else:
-                failed_count += 1
+            async with semaphore:
+                result = await twilio_service.send_sms(
+                    guest.phone_number, content, skip_optout_check=True
+                )
+
+            return {
+                "wedding_id": msg.wedding_id,
+                "guest_id": guest.id,
+                "scheduled_message_id": msg.id,
+                "phone_number": guest.phone_number,
+                "message_content": content,
+                "twilio_sid": result.get("sid"),
+                "status": _log_status(result),
+                "error_message": result.get("error"),
+                "sent_at": sent_at,
+            }
 
         except Exception as e:
             logger.error(f"Error sending to guest {guest.id}: {e}")
-            failed_count += 1
+            return None
+
+    rows = await asyncio.gather(*(
+        send_one(guest) for guest in guests
+        if not guest.opted_out and guest.sms_consent
+    ))
+
+    # Log the messages (inserted in bulk below)
+    log_rows = [row for row in rows if row is not None]
+    sent_count = len(handed_off) + sum(1 for row in log_rows if row["status"] == "sent")
+    # Deduplicated sends are neither sent nor failed: the guest already got
+    # the same text from another message
+    failed_count = sum(1 for row in rows if row is None or row["status"] == "failed")
+
+    if log_rows:
+        await db.execute(insert(MessageLog), log_rows)
 
     # Update message status
     msg.sent_count = sent_count
@@ -143,64 +218,218 @@ async def send_scheduled_message(
     logger.info(f"Scheduled message {msg.id}: sent={sent_count}, failed={failed_count}")
 
 
-async def get_target_guests(db: AsyncSession, msg: ScheduledMessage) -> list[Guest]:
-    """Get the guests targeted by a scheduled message."""
+def _log_status(result: dict) -> str:
+    """MessageLog status for a send_sms result."""
+    if result.get("status") == "deduplicated":
+        return "deduplicated"
+    return "sent" if result.get("success") else "failed"
+
+
+async def hand_off_to_twilio(db: AsyncSession, msg: ScheduledMessage) -> bool:
+    """
+    Schedule a fixed-date message with Twilio instead of sending it ourselves.
+
+    Called by process_fixed_schedules shortly before scheduled_at; Twilio then
+    delivers each guest's message on time without waiting for the next poll.
+    Scheduling is all-or-nothing: if any guest fails, the ones already
+    accepted are cancelled and the message is left for process_fixed_schedules
+    to send when it comes due.
+
+    Args:
+        db: Database session
+        msg: Fixed ScheduledMessage with its wedding and guests loaded
 
-    stmt = select(Guest).where(
-        Guest.wedding_id == msg.wedding_id,
-        Guest.opted_out == False,
-        Guest.sms_consent == True
+    Returns:
+        True if Twilio accepted the message for every targeted guest
+    """
+    # Twilio only schedules through a Messaging Service, within its window
+    if not (twilio_service.is_configured and settings.TWILIO_MESSAGING_SERVICE_SID):
+        return False
+    lead = msg.scheduled_at - datetime.utcnow()
+    if not TWILIO_SCHEDULE_MIN_LEAD <= lead <= TWILIO_HANDOFF_MAX_LEAD:
+        return False
+
+    # Guests left over from an earlier attempt are already with Twilio
+    handed_off = await get_handed_off_guest_ids(db, msg)
+    guests = [g for g in get_target_guests(msg) if g.id not in handed_off]
+    if not guests:
+        return False
+
+    partial = add_opt_out(template_service.render_wedding_part(msg.message_content, msg.wedding))
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+    async def schedule_one(guest: Guest) -> dict:
+        """Schedule one guest's message, returning its log row."""
+        content = template_service.render_guest_part(partial, guest)
+        try:
+            async with semaphore:
+                result = await twilio_service.schedule_sms(
+                    guest.phone_number, content, msg.scheduled_at, skip_optout_check=True
+                )
+        except Exception as e:
+            logger.error(f"Error scheduling message {msg.id} for guest {guest.id}: {e}")
+            result = {}
+
+        return {
+            "wedding_id": msg.wedding_id,
+            "guest_id": guest.id,
+            "scheduled_message_id": msg.id,
+            "phone_number": guest.phone_number,
+            "message_content": content,
+            "twilio_sid": result.get("sid") if result.get("success") else None,
+            "status": "scheduled",
+        }
+
+    log_rows = await asyncio.gather(*(schedule_one(guest) for guest in guests))
+
+    if not all(row["twilio_sid"] for row in log_rows):
+        # Roll back the partial hand-off; the polling job will send it instead
+        accepted = [row for row in log_rows if row["twilio_sid"]]
+        cancels = await asyncio.gather(*(
+            twilio_service.cancel_scheduled(row["twilio_sid"]) for row in accepted
+        ))
+        # Twilio still delivers anything it wouldn't cancel; log those so
+        # later hand-offs and the polling send skip their guests
+        stuck = [row for row, cancel in zip(accepted, cancels) if not cancel.get("success")]
+        if stuck:
+            await db.execute(insert(MessageLog), stuck)
+            await db.commit()
+        logger.warning(
+            f"Could not schedule message {msg.id} with Twilio, falling back to polling "
+            f"({len(stuck)} guests left scheduled with Twilio)"
+        )
+        return False
+
+    await db.execute(insert(MessageLog), log_rows)
+    msg.status = "sent_to_twilio"
+    msg.sent_count = len(handed_off) + len(log_rows)
+    await db.commit()
+
+    logger.info(f"Scheduled message {msg.id} with Twilio for {len(log_rows)} guests")
+    return True
+
+
+async def get_handed_off_guest_ids(db: AsyncSession, msg: ScheduledMessage) -> set[str]:
+    """Get the guests whose copy of msg is waiting in Twilio's scheduler."""
+    result = await db.execute(
+        select(MessageLog.guest_id).where(
+            MessageLog.scheduled_message_id == msg.id,
+            MessageLog.status == "scheduled"
+        )
     )
+    return set(result.scalars())
+
+
+async def load_wedding_guests(db: AsyncSession, messages: list[ScheduledMessage]):
+    """
+    Load the guest lists of every wedding referenced by the messages.
+
+    All guests come back in one query and are attached to Wedding.guests,
+    so get_target_guests can filter in memory instead of querying once per
+    message.
+    """
+    weddings = {msg.wedding_id: msg.wedding for msg in messages}
+    if not weddings:
+        return
+
+    stmt = select(Guest).where(Guest.wedding_id.in_(weddings))
+    result = await db.execute(stmt)
+
+    guests_by_wedding = {wedding_id: [] for wedding_id in weddings}
+    for guest in result.scalars():
+        guests_by_wedding[guest.wedding_id].append(guest)
+
+    for wedding_id, wedding in weddings.items():
+        set_committed_value(wedding, "guests", guests_by_wedding[wedding_id])
+
+
+def get_target_guests(msg: ScheduledMessage) -> list[Guest]:
+    """Get the guests targeted by a scheduled message from its loaded wedding."""
+
+    guests = [
+        g for g in msg.wedding.guests
+        if not g.opted_out and g.sms_consent and g.phone_valid
+    ]
 
     if msg.recipient_type == "group" and msg.recipient_filter:
         group_name = msg.recipient_filter.get("group")
         if group_name:
-            stmt = stmt.where(Guest.group_name == group_name)
+            guests = [g for g in guests if g.group_name == group_name]
 
     elif msg.recipient_type == "individual" and msg.recipient_filter:
-        guest_ids = msg.recipient_filter.get("guest_ids", [])
+        guest_ids = set(msg.recipient_filter.get("guest_ids", []))
         if guest_ids:
-            stmt = stmt.where(Guest.id.in_(guest_ids))
+            guests = [g for g in guests if g.id in guest_ids]
 
     # "all" type doesn't need additional filtering
 
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return guests
 
 
 async def process_fixed_schedules():
     """
     Process messages with fixed-date scheduling.
 
-    This handles messages scheduled for a specific datetime that weren't
-    sent via Twilio's native scheduling (fallback for immediate sends).
+    Messages coming due within TWILIO_HANDOFF_MAX_LEAD are handed to Twilio's
+    native scheduling (see hand_off_to_twilio), and handed-off messages past
+    their send time are marked sent. Messages that are due are sent directly, which covers anything Twilio didn't take, such as messages
+    created under 15 minutes ahead or without a Messaging Service.
     """
     logger.info("Running process_fixed_schedules job")
 
     async with async_session_maker() as db:
         now = datetime.utcnow()
 
+        # Twilio has delivered handed-off messages whose send time has passed
+        await db.execute(
+            update(ScheduledMessage)
+            .where(
+                ScheduledMessage.status == "sent_to_twilio",
+                ScheduledMessage.scheduled_at <= now
+            )
+            .values(status="sent", sent_at=ScheduledMessage.scheduled_at)
+        )
+        await db.commit()
+
+        if twilio_service.is_configured and settings.TWILIO_MESSAGING_SERVICE_SID:
+            # Hand off messages coming due soon
+            stmt = select(ScheduledMessage).join(ScheduledMessage.wedding).where(
+                ScheduledMessage.schedule_type == "fixed",
+                ScheduledMessage.status == "scheduled",
+                ScheduledMessage.scheduled_at >= now + TWILIO_SCHEDULE_MIN_LEAD,
+                ScheduledMessage.scheduled_at <= now + TWILIO_HANDOFF_MAX_LEAD
+            ).options(contains_eager(ScheduledMessage.wedding))
+
+            async for messages in iter_message_batches(db, stmt):
+                await load_wedding_guests(db, messages)
+
+                for msg in messages:
+                    try:
+                        await hand_off_to_twilio(db, msg)
+                    except Exception as e:
+                        # Left scheduled; polling sends it when due
+                        logger.error(f"Error handing off message {msg.id}: {e}")
+
         # Find fixed-schedule messages due to be sent
-        stmt = select(ScheduledMessage).where(
+        stmt = select(ScheduledMessage).join(ScheduledMessage.wedding).where(
             ScheduledMessage.schedule_type == "fixed",
             ScheduledMessage.status == "scheduled",
             ScheduledMessage.scheduled_at <= now
-        ).options(selectinload(ScheduledMessage.wedding))
+        ).options(contains_eager(ScheduledMessage.wedding))
 
-        result = await db.execute(stmt)
-        messages = result.scalars().all()
+        async for messages in iter_message_batches(db, stmt):
+            await load_wedding_guests(db, messages)
 
-        twilio_service = TwilioService()
-        template_service = TemplateService()
+            for msg in messages:
+                try:
+                    logger.info(f"Processing fixed message {msg.id}")
+                    await send_scheduled_message(db, msg, twilio_service, template_service)
+                except Exception as e:
+                    logger.error(f"Error processing message {msg.id}: {e}")
+                    msg.status = "failed"
 
-        for msg in messages:
-            try:
-                logger.info(f"Processing fixed message {msg.id}")
-                await send_scheduled_message(db, msg, twilio_service, template_service)
-            except Exception as e:
-                logger.error(f"Error processing message {msg.id}: {e}")
-                msg.status = "failed"
-                await db.commit()
+            # Persist any failures from this batch in one commit
+            await db.commit()
 
 
 async def retry_failed_messages():
@@ -217,22 +446,33 @@ async def retry_failed_messages():
         result = await db.execute(stmt)
         logs = result.scalars().all()
 
-        twilio_service = TwilioService()
+        semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
 
-        for log in logs:
+        async def retry_one(log: MessageLog) -> dict:
+            """Resend one log's message and return its column updates."""
             try:
-                result = await twilio_service.send_sms(log.phone_number, log.message_content)
+                async with semaphore:
+                    result = await twilio_service.send_sms(log.phone_number, log.message_content)
 
                 if result.get("success"):
-                    log.status = "sent"
-                    log.twilio_sid = result.get("sid")
-                else:
-                    log.retry_count += 1
-                    log.error_message = result.get("error")
-
-                await db.commit()
+                    return {
+                        "id": log.id,
+                        "status": "sent",
+                        "twilio_sid": result.get("sid"),
+                    }
+                return {
+                    "id": log.id,
+                    "retry_count": log.retry_count + 1,
+                    "error_message": result.get("error"),
+                }
 
             except Exception as e:
                 logger.error(f"Error retrying message {log.id}: {e}")
-                log.retry_count += 1
-                await db.commit()
+                return {"id": log.id, "retry_count": log.retry_count + 1}
+
+        updates = await asyncio.gather(*(retry_one(log) for log in logs))
+
+        # Bulk UPDATE by primary key, grouped into one executemany per key set
+        if updates:
+            await db.execute(update(MessageLog), updates)
+            await db.commit()
@@ -1,12 +1,18 @@
 """Template service for rendering SMS templates with variables."""
 import re
 from datetime import date, datetime
-from typing import Optional, Dict, Any, Callable
+from functools import lru_cache
+from typing import Optional, Dict, Any, Callable, Tuple, Union
 
 from models.wedding import Wedding
 from models.sms import Guest
 
 
+# The only guest-specific variable; everything else depends on the wedding
+GUEST_NAME_PLACEHOLDER = "{{guest_name}}"
+
+
+@lru_cache(maxsize=1024)
 def format_date(d: Optional[date]) -> str:
     """Format date for SMS display."""
     if not d:
@@ -19,6 +25,15 @@ def format_time(t: Optional[str]) -> str:
     return t or "TBD"
 
 
+def _resolve(segment: Tuple[str, Callable], guest: Optional[Guest], wedding: Wedding) -> str:
+    """Evaluate one compiled variable segment."""
+    var_name, resolver = segment
+    try:
+        return resolver(guest, wedding) or ""  # re.sub treated None as empty
+    except Exception:
+        return f"[{var_name}]"  # Fallback if variable fails
+
+
 class TemplateService:
     """Service for rendering SMS templates with dynamic variables."""
 
@@ -56,16 +71,60 @@ class TemplateService:
         Returns:
             Rendered string with all variables replaced
         """
-        def replace_var(match: re.Match) -> str:
-            var_name = match.group(1)
-            if var_name in self.VARIABLES:
-                try:
-                    return self.VARIABLES[var_name](guest, wedding)
-                except Exception:
-                    return f"[{var_name}]"  # Fallback if variable fails
-            return match.group(0)  # Keep original if not found
+        return "".join([
+            part if isinstance(part, str) else _resolve(part, guest, wedding)
+            for part in self._compile(template)
+        ])
+
+    def render_wedding_part(self, template: str, wedding: Wedding) -> str:
+        """
+        Render only the wedding-level variables of a template.
+
+        Every placeholder except {{guest_name}} is resolved, so a message
+        going to many guests is rendered once and then finished per guest
+        with render_guest_part().
+
+        Args:
+            template: Template string with {{variable}} placeholders
+            wedding: Wedding object for wedding-specific variables
+
+        Returns:
+            Partially rendered string with {{guest_name}} left in place
+        """
+        return "".join([
+            part if isinstance(part, str)
+            else GUEST_NAME_PLACEHOLDER if part[0] == "guest_name"
+            else _resolve(part, None, wedding)
+            for part in self._compile(template)
+        ])
+
+    @staticmethod
+    def render_guest_part(partial: str, guest: Guest) -> str:
+        """Fill {{guest_name}} into a string from render_wedding_part()."""
+        return partial.replace(GUEST_NAME_PLACEHOLDER, guest.name or "")
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compile(template: str) -> Tuple[Union[str, Tuple[str, Callable]], ...]:
+        """
+        Split a template into literal text and (name, resolver) segments.
 
-        return self.VARIABLE_PATTERN.sub(replace_var, template)
+        Unknown placeholders are kept as literal text, so rendering is a
+        single join with no regex work after the first call per template.
+        (str.format_map with a lazy dict was measured slower: its __missing__
+        hook is still a Python call per placeholder.)
+        """
+        pieces = TemplateService.VARIABLE_PATTERN.split(template)
+        segments = []
+        for i, piece in enumerate(pieces):
+            if i % 2 == 0:
+                if piece:
+                    segments.append(piece)
+            elif piece in TemplateService.VARIABLES:
+                segments.append((piece, TemplateService.VARIABLES[piece]))
+            else:
+                segments.append(f"{{{{{piece}}}}}")  # Keep original if not found
+        return tuple(segments)
 
     def get_available_variables(self) -> list[dict]:
         """
@@ -121,10 +180,9 @@ class TemplateService:
             template: Template string to validate
 
         Returns:
-            Tuple of (is_valid, list of unknown variables)
+            Tuple of (is_valid, sorted list of distinct unknown variables)
         """
-        matches = self.VARIABLE_PATTERN.findall(template)
-        unknown = [m for m in matches if m not in self.VARIABLES]
+        unknown = sorted(set(self.VARIABLE_PATTERN.findall(template)) - self.VARIABLES.keys())
         return len(unknown) == 0, unknown
 
 
@@ -1,16 +1,53 @@
 """Twilio SMS service for sending and scheduling messages."""
-import asyncio
+import itertools
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, Dict
-from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Optional, Tuple, Dict
 
+import httpx
 import phonenumbers
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
+from urllib3.util.retry import Retry
 from twilio.base.exceptions import TwilioRestException
 from twilio.request_validator import RequestValidator
 
 from core.config import settings
 
+TWILIO_API_BASE = "https://api.twilio.com/2010-04-01"
+
+OPT_OUT_TEXT = "\n\nReply STOP to unsubscribe"
+
+# Identical texts to the same number within this window are sent only once,
+# e.g. when two scheduled messages with the same content fire together
+DEDUP_WINDOW_SECONDS = 300
+_DEDUP_MAX_ENTRIES = 10_000
+
+
+def add_opt_out(body: str) -> str:
+    """Append the opt-out line unless the message already mentions STOP (TCPA)."""
+    if "STOP" in body.upper():
+        return body
+    return body.rstrip() + OPT_OUT_TEXT
+
+
+def _pooled_http_client() -> TwilioHttpClient:
+    """
+    Build the sync Client's HTTP client with a larger keep-alive pool.
+
+    Twilio's default adapter holds at most cpu_count + 4 connections. The
+    retries can't duplicate a text: urllib3 only retries a POST when the
+    connection failed before the request was sent.
+    """
+    http_client = TwilioHttpClient(timeout=10)
+    http_client.session.mount("https://", HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=50,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    ))
+    return http_client
+
 
 class TwilioService:
     """Async-compatible Twilio SMS service."""
@@ -18,7 +55,9 @@ class TwilioService:
     def __init__(self):
         """Initialize Twilio client."""
         self._client: Optional[Client] = None
-        self._executor = ThreadPoolExecutor(max_workers=5)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._recent_sends: Dict[Tuple[str, int], float] = {}
+        self._from_numbers: Optional[Iterator[str]] = None
 
     @property
     def client(self) -> Client:
@@ -28,10 +67,75 @@ class TwilioService:
                 raise ValueError("Twilio credentials not configured")
             self._client = Client(
                 settings.TWILIO_ACCOUNT_SID,
-                settings.TWILIO_AUTH_TOKEN
+                settings.TWILIO_AUTH_TOKEN,
+                http_client=_pooled_http_client(),
             )
         return self._client
 
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """
+        Lazy initialization of the async REST client.
+
+        The async methods call Twilio's REST API directly so sends don't each
+        hold a worker thread for the length of the HTTP round trip; the sync
+        Client above is kept for scripts.
+        """
+        if self._http is None:
+            if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+                raise ValueError("Twilio credentials not configured")
+            self._http = httpx.AsyncClient(
+                base_url=f"{TWILIO_API_BASE}/Accounts/{settings.TWILIO_ACCOUNT_SID}",
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                timeout=10,
+            )
+        return self._http
+
+    async def close(self):
+        """Close the async REST client's connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _request(self, method: str, path: str, data: Optional[dict] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Call the Twilio REST API.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the account, e.g. "/Messages.json"
+            data: Form parameters
+
+        Returns:
+            Tuple of (ok, JSON body); failed calls carry Twilio's code and message
+        """
+        try:
+            response = await self.http.request(method, path, data=data)
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return False, {"code": None, "message": str(e)}
+
+        return not response.is_error, body
+
+    @staticmethod
+    def _error_result(sid: Optional[str], body: Dict[str, Any], **extra) -> dict:
+        """Build the failure dict returned by the async methods."""
+        code = body.get("code")
+        return {
+            "success": False,
+            "sid": sid,
+            **extra,
+            "error_code": str(code) if code is not None else None,
+            "error_message": body.get("message"),
+        }
+
+    def _next_from_number(self) -> Optional[str]:
+        """Round-robin over TWILIO_PHONE_NUMBER_POOL, or TWILIO_PHONE_NUMBER alone."""
+        if self._from_numbers is None:
+            pool = settings.TWILIO_PHONE_NUMBER_POOL or [settings.TWILIO_PHONE_NUMBER]
+            self._from_numbers = itertools.cycle(pool)
+        return next(self._from_numbers)
+
     @property
     def is_configured(self) -> bool:
         """Check if Twilio is properly configured."""
@@ -63,7 +167,7 @@ class TwilioService:
 
     def _send_sms_sync(self, to: str, body: str, schedule_at: Optional[datetime] = None) -> dict:
         """
-        Synchronous SMS send (runs in thread pool).
+        Synchronous SMS send, for scripts outside the event loop.
 
         Args:
             to: Phone number in E.164 format
@@ -84,7 +188,7 @@ class TwilioService:
             if settings.TWILIO_MESSAGING_SERVICE_SID:
                 params["messaging_service_sid"] = settings.TWILIO_MESSAGING_SERVICE_SID
             else:
-                params["from_"] = settings.TWILIO_PHONE_NUMBER
+                params["from_"] = self._next_from_number()
 
             # Add scheduling if requested (Twilio requires at least 15 min ahead)
             if schedule_at:
@@ -118,31 +222,104 @@ class TwilioService:
                 "error_message": e.msg,
             }
 
-    async def send_sms(self, to: str, body: str) -> dict:
+    async def _create_message(self, to: str, body: str, schedule_at: Optional[datetime] = None) -> dict:
+        """
+        Create a message through the REST API (async counterpart of _send_sms_sync).
+
+        Returns:
+            Dict with sid, status, and other message details
+        """
+        params = {
+            "To": to,
+            "Body": body,
+        }
+
+        # Use messaging service if available, otherwise use phone number
+        if settings.TWILIO_MESSAGING_SERVICE_SID:
+            params["MessagingServiceSid"] = settings.TWILIO_MESSAGING_SERVICE_SID
+        else:
+            params["From"] = self._next_from_number()
+
+        # Add scheduling if requested (Twilio requires at least 15 min ahead)
+        if schedule_at:
+            min_schedule = datetime.utcnow() + timedelta(minutes=15)
+            if schedule_at < min_schedule:
+                schedule_at = min_schedule
+
+            params["SendAt"] = schedule_at.isoformat() + "Z"
+            params["ScheduleType"] = "fixed"
+
+        ok, message = await self._request("POST", "/Messages.json", params)
+        if not ok:
+            return self._error_result(None, message, status="failed", to=to)
+
+        return {
+            "success": True,
+            "sid": message["sid"],
+            "status": message["status"],
+            "to": message["to"],
+            "date_created": message.get("date_created"),
+            "error_code": message.get("error_code"),
+            "error_message": message.get("error_message"),
+        }
+
+    def _claim_send(self, key: Tuple[str, int]) -> bool:
+        """
+        Record an outgoing send unless the same one went out recently.
+
+        Returns:
+            False if key was sent within DEDUP_WINDOW_SECONDS
+        """
+        now = time.monotonic()
+        last = self._recent_sends.get(key)
+        if last is not None and now - last < DEDUP_WINDOW_SECONDS:
+            return False
+
+        if len(self._recent_sends) >= _DEDUP_MAX_ENTRIES:
+            self._recent_sends = {
+                k: t for k, t in self._recent_sends.items()
+                if now - t < DEDUP_WINDOW_SECONDS
+            }
+        self._recent_sends[key] = now
+        return True
+
+    async def send_sms(self, to: str, body: str, skip_optout_check: bool = False) -> dict:
         """
         Send SMS immediately (async).
 
         Args:
             to: Phone number in E.164 format
             body: Message content (will have opt-out text appended)
+            skip_optout_check: Body already went through add_opt_out()
 
         Returns:
             Dict with sid, status, and other details
         """
         # Ensure opt-out text is included (TCPA compliance)
-        if "STOP" not in body.upper():
-            body = body.rstrip() + "\n\nReply STOP to unsubscribe"
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self._executor,
-            self._send_sms_sync,
-            to,
-            body,
-            None
-        )
+        if not skip_optout_check:
+            body = add_opt_out(body)
+
+        # Claimed before the request so concurrent duplicates are caught too
+        key = (to, hash(body))
+        if not self._claim_send(key):
+            return {
+                "success": True,
+                "sid": None,
+                "status": "deduplicated",
+                "to": to,
+                "error_code": None,
+                "error_message": None,
+            }
+
+        result = await self._create_message(to, body)
+        if not result["success"]:
+            # Let a retry of a failed send through
+            self._recent_sends.pop(key, None)
+        return result
 
-    async def schedule_sms(self, to: str, body: str, send_at: datetime) -> dict:
+    async def schedule_sms(
+        self, to: str, body: str, send_at: datetime, skip_optout_check: bool = False
+    ) -> dict:
         """
         Schedule SMS for future delivery (async).
 
@@ -150,22 +327,16 @@ class TwilioService:
             to: Phone number in E.164 format
             body: Message content
             send_at: When to send (must be 15 min to 35 days in future)
+            skip_optout_check: Body already went through add_opt_out()
 
         Returns:
             Dict with sid, status, and other details
         """
         # Ensure opt-out text is included
-        if "STOP" not in body.upper():
-            body = body.rstrip() + "\n\nReply STOP to unsubscribe"
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self._executor,
-            self._send_sms_sync,
-            to,
-            body,
-            send_at
-        )
+        if not skip_optout_check:
+            body = add_opt_out(body)
+
+        return await self._create_message(to, body, send_at)
 
     def _cancel_message_sync(self, message_sid: str) -> dict:
         """Cancel a scheduled message (sync)."""
@@ -186,12 +357,17 @@ class TwilioService:
 
     async def cancel_scheduled(self, message_sid: str) -> dict:
         """Cancel a scheduled message (async)."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self._executor,
-            self._cancel_message_sync,
-            message_sid
+        ok, message = await self._request(
+            "POST", f"/Messages/{message_sid}.json", {"Status": "canceled"}
         )
+        if not ok:
+            return self._error_result(message_sid, message)
+
+        return {
+            "success": True,
+            "sid": message["sid"],
+            "status": message["status"],
+        }
 
     def _get_message_status_sync(self, message_sid: str) -> dict:
         """Get message status (sync)."""
@@ -216,12 +392,19 @@ class TwilioService:
 
     async def get_message_status(self, message_sid: str) -> dict:
         """Get the current status of a message (async)."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self._executor,
-            self._get_message_status_sync,
-            message_sid
-        )
+        ok, message = await self._request("GET", f"/Messages/{message_sid}.json")
+        if not ok:
+            return self._error_result(message_sid, message)
+
+        return {
+            "success": True,
+            "sid": message["sid"],
+            "status": message["status"],
+            "to": message["to"],
+            "date_sent": message.get("date_sent"),
+            "error_code": message.get("error_code"),
+            "error_message": message.get("error_message"),
+        }
 
     def is_quiet_hours(self, hour: int) -> bool:
         """
@@ -1,58 +1,180 @@
 """Test script for vendor API endpoints."""
 import asyncio
+import base64
+import json
+import logging
+import os
+import time
 import httpx
 import sys
 from datetime import date, timedelta
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
 
-BASE_URL = "http://localhost:8000"
+try:
+    # Faster C serializer; writes bytes directly so httpx doesn't re-encode
+    from orjson import dumps as _dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
-async def main():
-    async with httpx.AsyncClient() as client:
-        # 1. Register a test user
-        print("1. Registering test user...")
-        register_resp = await client.post(
-            f"{BASE_URL}/api/auth/register",
-            json={
-                "email": f"vendortest{date.today().isoformat()}@test.com",
-                "password": "TestPass123!",
-                "name": "Vendor Test User"
+try:
+    # libuv event loop; uvicorn[standard] installs it everywhere but Windows
+    from uvloop import run as run_async
+except ImportError:
+    from asyncio import run as run_async
+
+# Set to test a running server (e.g. http://localhost:8000); unset runs the
+# app in-process through ASGITransport, with no server or sockets involved
+BASE_URL = os.getenv("TEST_VENDOR_BASE_URL")
+
+# Reused across runs so repeat runs skip register/login (and its bcrypt hash)
+TOKEN_CACHE = Path(__file__).resolve().parent / ".test_vendor_token.json"
+
+
+@asynccontextmanager
+async def open_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Yield a client for BASE_URL, or for the app itself when it isn't set."""
+    if BASE_URL:
+        # One keep-alive client for the whole run; calls use paths under BASE_URL
+        async with httpx.AsyncClient(
+            base_url=BASE_URL,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            timeout=httpx.Timeout(10.0, connect=2.0),
+        ) as client:
+            yield client
+        return
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from main import app
+
+    # main configures DEBUG logging for the server; keep this script's output readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # ASGITransport doesn't send lifespan events, so run startup/shutdown here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+
+def check(resp: httpx.Response, expected_status: int) -> bool:
+    """Print a FAILED line unless resp has the expected status."""
+    if resp.status_code == expected_status:
+        return True
+    print(f"   FAILED: {resp.status_code} - {resp.text}")
+    return False
+
+
+async def post_json(
+    client: httpx.AsyncClient, path: str, body: dict, headers: dict | None = None
+) -> httpx.Response:
+    """POST body as JSON, serialized with orjson when it's installed."""
+    return await client.post(
+        path,
+        content=_dumps(body),
+        headers={**(headers or {}), "Content-Type": "application/json"},
+    )
+
+
+def load_cached_token(email: str) -> Optional[str]:
+    """Return the cached token for email if it is good for another minute."""
+    try:
+        cached = json.loads(TOKEN_CACHE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get("email") != email or cached.get("exp", 0) <= time.time() + 60:
+        return None
+    return cached.get("token")
+
+
+def save_cached_token(email: str, token: str) -> None:
+    """Cache token with its JWT expiry, readable only by the current user."""
+    payload = token.split(".")[1]
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    fd = os.open(TOKEN_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"email": email, "token": token, "exp": claims["exp"]}, f)
+
+
+async def get_token(client: httpx.AsyncClient, email: str) -> Optional[str]:
+    """
+    Get an access token for the test user.
+
+    Reuses the cached token while the server still accepts it; otherwise
+    registers the user, or logs in if it already exists, and caches the result.
+    """
+    token = load_cached_token(email)
+    if token:
+        me_resp = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+        if me_resp.status_code == 200:
+            print(f"   SUCCESS - Reusing cached token: {token[:20]}...")
+            return token
+
+    register_resp = await post_json(
+        client,
+        "/api/auth/register",
+        body={
+            "email": email,
+            "password": "TestPass123!",
+            "name": "Vendor Test User"
+        }
+    )
+    if register_resp.status_code == 201:
+        token = register_resp.json()["access_token"]
+    elif register_resp.status_code == 409:
+        # Try logging in instead
+        print("   User exists, logging in...")
+        login_resp = await post_json(
+            client,
+            "/api/auth/login",
+            body={
+                "email": email,
+                "password": "TestPass123!"
             }
         )
-        if register_resp.status_code == 201:
-            token = register_resp.json()["access_token"]
-            print(f"   SUCCESS - Got token: {token[:20]}...")
-        elif register_resp.status_code == 400 and "already registered" in register_resp.text:
-            # Try logging in instead
-            print("   User exists, logging in...")
-            login_resp = await client.post(
-                f"{BASE_URL}/api/auth/login",
-                json={
-                    "email": f"vendortest{date.today().isoformat()}@test.com",
-                    "password": "TestPass123!"
-                }
-            )
-            if login_resp.status_code == 200:
-                token = login_resp.json()["access_token"]
-                print(f"   SUCCESS - Got token: {token[:20]}...")
-            else:
-                print(f"   FAILED: {login_resp.status_code} - {login_resp.text}")
-                return
-        else:
-            print(f"   FAILED: {register_resp.status_code} - {register_resp.text}")
+        if login_resp.status_code != 200:
+            print(f"   FAILED: {login_resp.status_code} - {login_resp.text}")
+            return None
+        token = login_resp.json()["access_token"]
+    else:
+        print(f"   FAILED: {register_resp.status_code} - {register_resp.text}")
+        return None
+
+    print(f"   SUCCESS - Got token: {token[:20]}...")
+    save_cached_token(email, token)
+    return token
+
+
+async def main():
+    # Read the date once so a run crossing midnight keeps the same test user
+    today = date.today()
+    test_email = f"vendortest{today.isoformat()}@test.com"
+    wedding_date_iso = (today + timedelta(days=180)).isoformat()
+    paid_due_iso = (today - timedelta(days=30)).isoformat()
+    upcoming_due_iso = (today + timedelta(days=30)).isoformat()
+
+    async with open_client() as client:
+        # 1. Register a test user (or reuse a cached login)
+        print("1. Registering test user...")
+        token = await get_token(client, test_email)
+        if not token:
             return
 
         headers = {"Authorization": f"Bearer {token}"}
 
         # 2. Create a wedding for the test user
         print("\n2. Creating test wedding...")
-        wedding_date = date.today() + timedelta(days=180)
-        wedding_resp = await client.post(
-            f"{BASE_URL}/api/wedding/me",
+        wedding_resp = await post_json(
+            client,
+            "/api/wedding/me",
             headers=headers,
-            json={
+            body={
                 "partner1_name": "Test Partner 1",
                 "partner2_name": "Test Partner 2",
-                "wedding_date": wedding_date.isoformat(),
+                "wedding_date": wedding_date_iso,
                 "wedding_time": "4:00 PM",
                 "dress_code": "Semi-Formal",
             }
@@ -60,15 +182,15 @@ async def main():
         if wedding_resp.status_code in [200, 201]:
             wedding_data = wedding_resp.json()
             wedding_id = wedding_data.get("id")
-            print(f"   SUCCESS - Wedding created: {wedding_id}")
-        elif "already have a wedding" in wedding_resp.text:
+            print("   SUCCESS - Wedding created:", wedding_id)
+        elif wedding_resp.status_code == 409:
             print("   Wedding already exists, continuing...")
-            me_resp = await client.get(f"{BASE_URL}/api/wedding/me", headers=headers)
+            me_resp = await client.get("/api/wedding/me", headers=headers)
             if me_resp.status_code == 200:
                 wedding_id = me_resp.json().get("id")
-                print(f"   Existing wedding ID: {wedding_id}")
+                print("   Existing wedding ID:", wedding_id)
             else:
-                print(f"   FAILED to get existing wedding: {me_resp.text}")
+                print("   FAILED to get existing wedding:", me_resp.text)
                 return
         else:
             print(f"   FAILED: {wedding_resp.status_code} - {wedding_resp.text}")
@@ -76,7 +198,7 @@ async def main():
 
         # 3. Get vendor categories
         print("\n3. Getting vendor categories...")
-        cat_resp = await client.get(f"{BASE_URL}/api/vendors/categories")
+        cat_resp = await client.get("/api/vendors/categories")
         if cat_resp.status_code == 200:
             categories = cat_resp.json()["categories"]
             print(f"   SUCCESS - {len(categories)} categories: {categories[:5]}...")
@@ -85,10 +207,11 @@ async def main():
 
         # 4. Create a sample vendor (Photographer)
         print("\n4. Creating sample vendor (Photographer)...")
-        vendor_resp = await client.post(
-            f"{BASE_URL}/api/vendors/",
+        vendor_resp = await post_json(
+            client,
+            "/api/vendors/",
             headers=headers,
-            json={
+            body={
                 "business_name": "Amazing Photography Co",
                 "category": "photography",
                 "contact_name": "John Photographer",
@@ -100,7 +223,7 @@ async def main():
                 "contract_amount": 5000.00,
                 "deposit_amount": 1000.00,
                 "service_description": "Full day wedding photography, 2 photographers, engagement session included",
-                "service_date": wedding_date.isoformat(),
+                "service_date": wedding_date_iso,
                 "arrival_time": "2:00 PM",
                 "end_time": "11:00 PM",
                 "notes": "Will also bring a drone for aerial shots!"
@@ -108,118 +231,112 @@ async def main():
         )
         if vendor_resp.status_code == 201:
             vendor_id = vendor_resp.json()["id"]
-            print(f"   SUCCESS - Vendor created: {vendor_id}")
+            print("   SUCCESS - Vendor created:", vendor_id)
         else:
             print(f"   FAILED: {vendor_resp.status_code} - {vendor_resp.text}")
             return
 
-        # 5. Add a payment to the vendor
-        print("\n5. Adding payment to vendor...")
-        payment_resp = await client.post(
-            f"{BASE_URL}/api/vendors/{vendor_id}/payments",
-            headers=headers,
-            json={
-                "payment_type": "deposit",
-                "description": "Initial deposit",
-                "amount": 1000.00,
-                "due_date": (date.today() - timedelta(days=30)).isoformat(),
-                "status": "paid",
-                "payment_method": "Credit Card"
-            }
+        # 5-7. Payments and the communication log only need vendor_id, so
+        # send them together
+        async with asyncio.TaskGroup() as tg:
+            payment_task = tg.create_task(
+                post_json(
+                    client,
+                    f"/api/vendors/{vendor_id}/payments",
+                    headers=headers,
+                    body={
+                        "payment_type": "deposit",
+                        "description": "Initial deposit",
+                        "amount": 1000.00,
+                        "due_date": paid_due_iso,
+                        "status": "paid",
+                        "payment_method": "Credit Card"
+                    }
+                )
+            )
+            payment2_task = tg.create_task(
+                post_json(
+                    client,
+                    f"/api/vendors/{vendor_id}/payments",
+                    headers=headers,
+                    body={
+                        "payment_type": "installment",
+                        "description": "Second payment",
+                        "amount": 2000.00,
+                        "due_date": upcoming_due_iso,
+                        "status": "pending",
+                    }
+                )
+            )
+            comm_task = tg.create_task(
+                post_json(
+                    client,
+                    f"/api/vendors/{vendor_id}/communications",
+                    headers=headers,
+                    body={
+                        "communication_type": "email",
+                        "direction": "outbound",
+                        "subject": "Confirming booking details",
+                        "content": "Hi John, just wanted to confirm our wedding date and timeline. Looking forward to working with you!"
+                    }
+                )
+            )
+        payment_resp, payment2_resp, comm_resp = (
+            payment_task.result(), payment2_task.result(), comm_task.result()
         )
-        if payment_resp.status_code == 201:
-            payment_id = payment_resp.json()["id"]
-            print(f"   SUCCESS - Payment added: {payment_id}")
-        else:
-            print(f"   FAILED: {payment_resp.status_code} - {payment_resp.text}")
 
-        # Add another upcoming payment
+        print("\n5. Adding payment to vendor...")
+        if check(payment_resp, 201):
+            print("   SUCCESS - Payment added:", payment_resp.json()['id'])
+
         print("\n6. Adding upcoming payment...")
-        payment2_resp = await client.post(
-            f"{BASE_URL}/api/vendors/{vendor_id}/payments",
-            headers=headers,
-            json={
-                "payment_type": "installment",
-                "description": "Second payment",
-                "amount": 2000.00,
-                "due_date": (date.today() + timedelta(days=30)).isoformat(),
-                "status": "pending",
-            }
-        )
-        if payment2_resp.status_code == 201:
-            print(f"   SUCCESS - Payment added: {payment2_resp.json()['id']}")
-        else:
-            print(f"   FAILED: {payment2_resp.status_code} - {payment2_resp.text}")
+        if check(payment2_resp, 201):
+            print("   SUCCESS - Payment added:", payment2_resp.json()['id'])
 
-        # 7. Add a communication log
         print("\n7. Adding communication log...")
-        comm_resp = await client.post(
-            f"{BASE_URL}/api/vendors/{vendor_id}/communications",
-            headers=headers,
-            json={
-                "communication_type": "email",
-                "direction": "outbound",
-                "subject": "Confirming booking details",
-                "content": "Hi John, just wanted to confirm our wedding date and timeline. Looking forward to working with you!"
-            }
+        if check(comm_resp, 201):
+            print("   SUCCESS - Communication logged:", comm_resp.json()['id'])
+
+        # 8-10. Independent reads
+        async with asyncio.TaskGroup() as tg:
+            detail_task = tg.create_task(client.get(f"/api/vendors/{vendor_id}", headers=headers))
+            summary_task = tg.create_task(client.get("/api/vendors/summary/all", headers=headers))
+            list_task = tg.create_task(client.get("/api/vendors/", headers=headers))
+        detail_resp, summary_resp, list_resp = (
+            detail_task.result(), summary_task.result(), list_task.result()
         )
-        if comm_resp.status_code == 201:
-            print(f"   SUCCESS - Communication logged: {comm_resp.json()['id']}")
-        else:
-            print(f"   FAILED: {comm_resp.status_code} - {comm_resp.text}")
 
-        # 8. Get vendor details
         print("\n8. Getting vendor details...")
-        detail_resp = await client.get(
-            f"{BASE_URL}/api/vendors/{vendor_id}",
-            headers=headers
-        )
-        if detail_resp.status_code == 200:
+        if check(detail_resp, 200):
             vendor_data = detail_resp.json()
-            print(f"   SUCCESS - Vendor: {vendor_data['business_name']}")
-            print(f"   Category: {vendor_data['category']}")
-            print(f"   Status: {vendor_data['status']}")
+            print("   SUCCESS - Vendor:", vendor_data['business_name'])
+            print("   Category:", vendor_data['category'])
+            print("   Status:", vendor_data['status'])
             print(f"   Contract: ${vendor_data['contract_amount']}")
             print(f"   Payments: {len(vendor_data['payments'])} records")
-            print(f"   Payment Summary: {vendor_data['payment_summary']}")
+            print("   Payment Summary:", vendor_data['payment_summary'])
             print(f"   Communications: {len(vendor_data['communications'])} records")
-        else:
-            print(f"   FAILED: {detail_resp.status_code} - {detail_resp.text}")
 
-        # 9. Get vendor summary
         print("\n9. Getting vendor summary...")
-        summary_resp = await client.get(
-            f"{BASE_URL}/api/vendors/summary/all",
-            headers=headers
-        )
-        if summary_resp.status_code == 200:
+        if check(summary_resp, 200):
             summary = summary_resp.json()
-            print(f"   SUCCESS - Summary:")
-            print(f"   Total vendors: {summary['summary']['total_vendors']}")
+            print("   SUCCESS - Summary:")
+            print("   Total vendors:", summary['summary']['total_vendors'])
             print(f"   Total contract: ${summary['summary']['total_contract']}")
             print(f"   Total paid: ${summary['summary']['total_paid']}")
             print(f"   Balance due: ${summary['summary']['balance_due']}")
-            print(f"   Upcoming payments: {len(summary['upcoming_payments'])}")
-        else:
-            print(f"   FAILED: {summary_resp.status_code} - {summary_resp.text}")
+            print("   Upcoming payments:", len(summary['upcoming_payments']))
 
-        # 10. List all vendors
         print("\n10. Listing all vendors...")
-        list_resp = await client.get(
-            f"{BASE_URL}/api/vendors/",
-            headers=headers
-        )
-        if list_resp.status_code == 200:
+        if check(list_resp, 200):
             vendors = list_resp.json()
             print(f"   SUCCESS - Found {vendors['total']} vendors")
             for v in vendors['vendors']:
                 print(f"   - {v['business_name']} ({v['category']}) - {v['status']}")
-        else:
-            print(f"   FAILED: {list_resp.status_code} - {list_resp.text}")
 
         print("\n" + "="*50)
         print("ALL BACKEND TESTS PASSED!")
         print("="*50)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_async(main())
@@ -489,7 +489,7 @@ export default function SMSManager({ token, weddingId }: SMSManagerProps) {
                   <p className="text-sm text-gray-500 break-words">
                     {msg.status === 'sent' || msg.status === 'partially_sent' ? (
                       <>Sent: {msg.sent_count}/{msg.total_recipients}</>
-                    ) : msg.status === 'scheduled' ? (
+                    ) : msg.status === 'scheduled' || msg.status === 'sent_to_twilio' ? (
                       msg.schedule_type === 'relative' && msg.relative_days != null ? (
                         <>{Math.abs(msg.relative_days)} days {msg.relative_days < 0 ? 'before' : 'after'} {msg.relative_to?.replace('_', ' ')}</>
                       ) : (
@@ -503,13 +503,13 @@ export default function SMSManager({ token, weddingId }: SMSManagerProps) {
                 <div className="flex items-center gap-2 flex-shrink-0">
                   <span className={`text-xs px-2 py-1 rounded whitespace-nowrap ${
                     msg.status === 'sent' ? 'bg-green-100 text-green-700' :
-                    msg.status === 'scheduled' ? 'bg-blue-100 text-blue-700' :
+                    msg.status === 'scheduled' || msg.status === 'sent_to_twilio' ? 'bg-blue-100 text-blue-700' :
                     msg.status === 'failed' ? 'bg-red-100 text-red-700' :
                     'bg-gray-100 text-gray-700'
                   }`}>
-                    {msg.status}
+                    {msg.status === 'sent_to_twilio' ? 'scheduled' : msg.status}
                   </span>
-                  {msg.status === 'scheduled' && (
+                  {(msg.status === 'scheduled' || msg.status === 'sent_to_twilio') && (
                     <button
                       onClick={() => handleCancelScheduled(msg.id)}
                       className="text-gray-400 hover:text-red-600"